@@ -4,12 +4,33 @@ from __future__ import annotations
 
 import logging
 
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-
-from .client import GiraClient, State
-from .const import DOMAIN
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+
+from .client import GiraClient
+from .const import (
+    CONF_COMMAND_CONNECTION,
+    CONF_COMMAND_INTERVAL,
+    CONF_EVENT_TAGS,
+    CONF_RECORD_TRAFFIC,
+    CONF_SLOT_MAPPING,
+    DEFAULT_COMMAND_INTERVAL,
+    DOMAIN,
+    EVENT_VALUE,
+    SIGNAL_DEVICES_ADDED,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
+from .devices import ProjectDiff, Value, load_slot_mapping
+from .options import load_event_tags, load_option
+from .recorder import TrafficRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,8 +39,17 @@ PLATFORMS: list[Platform] = [
     Platform.COVER,
     Platform.CLIMATE,
     Platform.SWITCH,
+    Platform.SENSOR,
+    Platform.BINARY_SENSOR,
 ]
 
+# Seconds to wait before writing a changed project to disk
+SAVE_DELAY = 10
+
+SET_VALUES_SCHEMA = vol.Schema(
+    {vol.Required("values"): vol.Schema({cv.string: cv.string})}
+)
+
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the Gira HomeServer integration from configuration.yaml."""
@@ -39,28 +69,78 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.error("Missing configuration data")
         return False
 
+    # Installation specific slot names and transforms
+    slot_mapping = entry.options.get(CONF_SLOT_MAPPING, "")
+    device_config = load_option(entry.options, CONF_SLOT_MAPPING, load_slot_mapping)
+
     # Initialize the Client
-    client = GiraClient(host, port, username, password)
-
-    try:
-        # Attempt to connect and validate authentication
-        await client.connect()
-        if client.state != State.LOGGED_IN:
-            _LOGGER.error("Failed to log in to Gira Homeserver")
-            return False
-    except Exception as ex:
-        _LOGGER.error("Error connecting to Gira Homeserver: %s", ex)
-        return False
+    client = GiraClient(
+        host,
+        port,
+        username,
+        password,
+        command_interval=entry.options.get(
+            CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL
+        ),
+        session=async_get_clientsession(hass),
+        config=device_config,
+        command_connection=entry.options.get(CONF_COMMAND_CONNECTION, False),
+    )
+
+    # Start from the cached project so the XML download can be skipped
+    store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry.entry_id))
+    cached = await store.async_load()
+    # Devices were classified with the mapping at the time they were cached
+    if cached and cached.get(CONF_SLOT_MAPPING, "") == slot_mapping:
+        client.load_project(cached)
+
+    @callback
+    def async_export_project() -> dict:
+        """Return the project to cache, along with the mapping it was parsed with."""
+        return {**client.export_project(), CONF_SLOT_MAPPING: slot_mapping}
+
+    if entry.options.get(CONF_RECORD_TRAFFIC):
+        client.recorder = TrafficRecorder(
+            hass.config.path(f"{DOMAIN}_{entry.entry_id}.ndjson")
+        )
+        client.recorder.start()
 
     # Store the client in Home Assistant's data for this domain
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = client
 
+    @callback
+    def async_project_changed(diff: ProjectDiff) -> None:
+        """Persist a changed project and add entities for new devices."""
+        store.async_delay_save(async_export_project, SAVE_DELAY)
+
+        # Removed and rewired devices are handled by their entities
+        if diff.added:
+            async_dispatcher_send(
+                hass, SIGNAL_DEVICES_ADDED.format(entry_id=entry.entry_id), diff.added
+            )
+
+    entry.async_on_unload(client.subscribe_project(async_project_changed))
+
+    subscriptions = load_option(entry.options, CONF_EVENT_TAGS, load_event_tags)
+    if subscriptions:
+
+        @callback
+        def async_fire_value(tag: str, value: Value) -> None:
+            """Fire an event for a telegram on a subscribed tag."""
+            hass.bus.async_fire(
+                EVENT_VALUE, {"entry_id": entry.entry_id, "tag": tag, "value": value}
+            )
+
+        entry.async_on_unload(client.subscribe_events(subscriptions, async_fire_value))
+
     # Register services
     async def handle_refresh_devices(call):
         """Handle the refresh devices service call."""
-        client = hass.data[DOMAIN][entry.entry_id]
-        await client.discover_devices()
+        try:
+            await client.discover_devices()
+        except Exception as err:
+            _LOGGER.error("Error refreshing Gira HomeServer project: %s", err)
 
     async def handle_send_raw_command(call):
         """Handle the send raw command service call."""
@@ -87,16 +167,40 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.services.async_register(
         DOMAIN, "send_raw_command", handle_send_raw_command
     )
+    async def handle_set_values(call):
+        """Handle the set values service call."""
+        client = hass.data[DOMAIN][entry.entry_id]
+        try:
+            await client.update_values(call.data["values"].items())
+        except Exception as err:
+            _LOGGER.error("Error setting values: %s", err)
+
     hass.services.async_register(
         DOMAIN, "set_device_value", handle_set_device_value
     )
+    hass.services.async_register(
+        DOMAIN, "set_values", handle_set_values, schema=SET_VALUES_SCHEMA
+    )
 
     # Forward the config entry to supported platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Connect, log in and revalidate the cached project in the background,
+    # entities from the cache stay unavailable until the values are synced.
+    # Started after the platforms, which listen for tags in the first dump
+    client.start()
+
+    # Apply changed options by reloading the entry
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -105,5 +209,14 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         client = hass.data[DOMAIN].pop(entry.entry_id, None)
         if client:
             await client.disconnect()
+            if client.recorder:
+                # Flushes the remaining frames to disk
+                await hass.async_add_executor_job(client.recorder.stop)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached project of a deleted config entry."""
+    store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry.entry_id))
+    await store.async_remove()
@@ -0,0 +1,58 @@
+"""Binary sensors for tags outside the known Gira HomeServer devices."""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN
+from .client import GiraClient
+from .entity import GiraTagEntity, async_setup_tag_entities
+from .options import TagEntityConfig
+from .devices import Value
+
+_LOGGER = logging.getLogger(__name__)
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the Gira HomeServer binary sensor platform."""
+    async_setup_tag_entities(
+        hass, config_entry, async_add_entities, "binary_sensor", GiraTagBinarySensor
+    )
+
+class GiraTagBinarySensor(GiraTagEntity, BinarySensorEntity):
+    """A tag outside the known devices, on for any value but 0."""
+
+    def __init__(
+        self,
+        client: GiraClient,
+        tag: str,
+        value: Value,
+        config: TagEntityConfig,
+        enabled: bool,
+    ):
+        """Initialize the binary sensor."""
+        super().__init__(client, tag, value, config, enabled)
+        self._attr_unique_id = f"{DOMAIN}_binary_sensor_tag_{tag}"
+        if config.device_class:
+            try:
+                self._attr_device_class = BinarySensorDeviceClass(config.device_class)
+            except ValueError:
+                _LOGGER.warning("Unknown binary sensor device class: %s", config.device_class)
+
+    @property
+    def is_on(self) -> Optional[bool]:
+        """Return true if the tag is set."""
+        if isinstance(self._value, float):
+            return self._value != 0
+        return self._value.strip().lower() in ("1", "on", "true")
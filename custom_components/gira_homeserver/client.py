@@ -1,16 +1,234 @@
 import asyncio
+from collections import deque
+from dataclasses import dataclass
 import hashlib
+from http import HTTPStatus
 import logging
-from typing import Dict, Optional
+import random
+import time
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
 from enum import Enum
 
 import aiohttp
-from homeassistant.exceptions import ConfigEntryNotReady
 
-from custom_components.gira_homeserver.devices import Parser, SlotTypeEnum, DeviceTypeEnum
+from custom_components.gira_homeserver.devices import (
+    DEFAULT_CONFIG,
+    DeviceConfig,
+    Parser,
+    SlotMatcher,
+    SlotTypeEnum,
+    DeviceTypeEnum,
+    Device,
+    ProjectDiff,
+    TagIndex,
+    DEFAULT_TOLERANCES,
+    Value,
+    build_tag_index,
+    decode_value,
+    diff_devices,
+    encode_value,
+    value_changed,
+)
+from custom_components.gira_homeserver.metrics import ClientMetrics
+from custom_components.gira_homeserver.options import EventSubscriptions
+from custom_components.gira_homeserver.protocol import FrameReader, generate_hash
+from custom_components.gira_homeserver.recorder import RX, TX, TrafficRecorder
+from custom_components.gira_homeserver.const import DEFAULT_COMMAND_INTERVAL
 
 _LOGGER = logging.getLogger(__name__)
 
+VALID_ACTIONS = (1, 2, 91, 93, 100)
+# Actions that answer a request, all others are unsolicited updates
+RESPONSE_ACTIONS = (2, 91, 93, 100)
+REQUEST_TIMEOUT = 10
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+# A connection dropped sooner after login counts as a failed attempt
+STABLE_CONNECTION = 60
+# Consecutive failures after which commands stay on the event connection
+COMMAND_CONNECTION_MAX_FAILURES = 5
+PROJECT_CHUNK_SIZE = 262144
+# Upper bound for the decompressed project, protects against runaway downloads
+PROJECT_MAX_SIZE = 64 * 1024 * 1024
+PROJECT_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=10, sock_read=30)
+# Seconds to wait for the HomeServer to report the tag of a written value
+COMMAND_TIMEOUT = 3
+COMMAND_RETRIES = 1
+# Token bucket shared by all retries, so a congested link is not flooded
+RETRY_RATE = 2
+RETRY_BURST = 5
+# Hard limit for a login probe, a healthy HomeServer answers within milliseconds
+PROBE_TIMEOUT = 5
+
+
+class GiraError(Exception):
+    """Base class for errors talking to the Gira HomeServer."""
+
+
+class GiraConnectionError(GiraError):
+    """The HomeServer could not be reached."""
+
+
+class GiraAuthError(GiraError):
+    """The HomeServer rejected the credentials."""
+
+
+class GiraProtocolError(GiraError):
+    """The server did not answer like a HomeServer."""
+
+
+@dataclass(slots=True)
+class PendingCommand:
+    """A written value waiting for the HomeServer to report its tag."""
+    tag: str
+    value: str
+    expected: Value
+    # Last value reported by the server, restored if the command fails
+    previous: Optional[Value]
+    # Set once the frame carrying the value is written
+    deadline: Optional[float] = None
+    retries: int = 0
+    # Frames written for the tag that the server has not reported yet
+    unanswered: int = 0
+
+class CommandConnection:
+    """A second logged in connection that only carries commands and their echoes.
+
+    The event connection can be busy with value dumps and bursts of status
+    telegrams, this one stays idle apart from our own writes. Telegrams
+    received here are only checked against the outstanding commands, the
+    event connection delivers every value anyway. The connection keeps
+    reconnecting on its own, commands use the event connection meanwhile.
+    """
+
+    def __init__(self, client: "GiraClient"):
+        """Initialize the connection, call start to open it."""
+        self._client = client
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self._established = False
+        self.failures = 0
+
+    def start(self) -> None:
+        """Connect in the background and keep the connection alive."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Close the connection and stop reconnecting."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close()
+
+    async def write(self, data: bytes) -> bool:
+        """Send encoded frames, returns False if the connection is down."""
+        if not self.connected or self._writer is None:
+            return False
+        try:
+            self._writer.write(data)
+            await self._writer.drain()
+        except (ConnectionError, OSError) as err:
+            _LOGGER.warning("Command connection failed, using the event connection: %s", err)
+            self.connected = False
+            if self._writer:
+                self._writer.close()
+            return False
+        return True
+
+    async def _run(self) -> None:
+        """Log in, read echoes until the connection drops and reconnect with backoff.
+
+        Failed logins and connections dropped soon after login both count
+        as failures, so a server that enforces a client limit either way
+        is not hammered. After too many failures in a row the connection
+        gives up and commands stay on the event connection.
+        """
+        client = self._client
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                async with asyncio.timeout(REQUEST_TIMEOUT):
+                    frames = await self._open()
+            except (GiraError, ConnectionError, OSError, TimeoutError) as err:
+                await self._close()
+                self.failures += 1
+                # Servers with a client limit reject the second login, say so once
+                log = _LOGGER.warning if self.failures == 1 else _LOGGER.debug
+                log("Command connection unavailable, using the event connection: %s", err)
+            else:
+                if self._established:
+                    client.metrics.command_reconnects += 1
+                self._established = True
+                self.connected = True
+                connected_at = loop.time()
+                _LOGGER.debug("Command connection established")
+                try:
+                    async for frame in frames:
+                        client._handle_command_echoes(frame)
+                    _LOGGER.debug("Command connection closed by Gira HomeServer")
+                except (ConnectionError, OSError) as err:
+                    _LOGGER.debug("Command connection lost: %s", err)
+                await self._close()
+                if loop.time() - connected_at < STABLE_CONNECTION:
+                    self.failures += 1
+                else:
+                    self.failures = 0
+
+            if self.failures >= COMMAND_CONNECTION_MAX_FAILURES:
+                _LOGGER.warning(
+                    "Command connection failed %s times in a row, "
+                    "sending commands on the event connection",
+                    self.failures,
+                )
+                return
+            await asyncio.sleep(client._backoff_delay(self.failures))
+
+    async def _open(self) -> FrameReader:
+        """Open the socket and run the login exchange, returns the frame reader."""
+        client = self._client
+        self._reader, self._writer = await asyncio.open_connection(client.host, client.port)
+        frames = FrameReader(self._reader)
+
+        async def request(data: str, action: int) -> List[str]:
+            self._writer.write(f"{data}\x00".encode())
+            await self._writer.drain()
+            # Nothing but the login answers is expected before logging in
+            async for frame in frames:
+                parts = frame.split("|")
+                if parts[0] == str(action):
+                    return parts[1:]
+            raise ConnectionError("Connection closed during login")
+
+        await request("GET /QUAD/LOGIN \r\n\r\n", 100)
+        salt = await request(f"90|{client.username}|", 91)
+        if not salt or not salt[0]:
+            raise GiraProtocolError("Login response without salt")
+        token = await request(
+            f"92|{generate_hash(client.username, client.password, salt[0])}|", 93
+        )
+        if not token or not token[0]:
+            raise GiraProtocolError("Login response without token")
+        return frames
+
+    async def _close(self) -> None:
+        """Close the socket."""
+        self.connected = False
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self._writer = None
+        self._reader = None
+
 class State(Enum):
     DISCONNECTED = 1
     CONNECTED = 2
@@ -19,101 +237,418 @@ class State(Enum):
 class GiraClient:
     """Gira HomeServer client."""
 
-    def __init__(self, host: str, port: int, username: str, password: str):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        *,
+        command_interval: float = DEFAULT_COMMAND_INTERVAL,
+        session: Optional[aiohttp.ClientSession] = None,
+        tolerances: Optional[Dict[SlotTypeEnum, float]] = None,
+        config: Optional[Dict[DeviceTypeEnum, DeviceConfig]] = None,
+        command_connection: bool = False,
+    ):
         """Initialize the client."""
         self.host = host
         self.port = port
         self.username = username
         self.password = password
+        self.command_interval = command_interval
+        # Without a shared session the client keeps one of its own
+        self._session = session
+        self._owns_session = session is None
         self.state = State.DISCONNECTED
-        self.devices: Dict[str, dict] = {}
+        self.devices: Dict[str, Device] = {}
+        self._tags: TagIndex = {}
+        self.project_hash: Optional[str] = None
+        self._project_etag: Optional[str] = None
+        self._project_modified: Optional[str] = None
+        self._device_listeners: Dict[str, List[Callable[[], None]]] = {}
+        self._tag_listeners: Dict[str, List[Callable[[str, Value], None]]] = {}
+        # Last value of subscribed tags that are not wired to a device slot
+        self._tag_values: Dict[str, Value] = {}
+        self._new_tag_listeners: List[Callable[[str, Value], None]] = []
+        # Tags outside the project already handed to the new tag listeners
+        self._offered_tags: Set[str] = set()
+        self._tolerances = DEFAULT_TOLERANCES if tolerances is None else tolerances
+        self._config = config or DEFAULT_CONFIG
+        # Compiled once, every discovery classifies devices with it
+        self._matcher = SlotMatcher(self._config)
+        self.metrics = ClientMetrics()
+        # Set to a TrafficRecorder to write every frame to a file
+        self.recorder: Optional[TrafficRecorder] = None
+        # Optional second connection that carries the commands
+        self.command_connection: Optional[CommandConnection] = (
+            CommandConnection(self) if command_connection else None
+        )
+        # Tags whose telegrams are passed to the event listener unfiltered
+        self._event_tags: Optional[EventSubscriptions] = None
+        self._event_listener: Optional[Callable[[str, Value], None]] = None
+        self._connection_listeners: List[Callable[[], None]] = []
+        self._project_listeners: List[Callable[[ProjectDiff], None]] = []
         self._token: Optional[str] = None
         self._reader: Optional[asyncio.StreamReader] = None
         self._writer: Optional[asyncio.StreamWriter] = None
-        self._lock = asyncio.Lock()
+        self._frames: Optional[FrameReader] = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._waiters: Dict[int, Deque[asyncio.Future]] = {}
+        self._write_task: Optional[asyncio.Task] = None
+        self._write_event = asyncio.Event()
+        self._write_timer: Optional[asyncio.TimerHandle] = None
+        self._pending_writes: Dict[str, str] = {}
+        self._last_sent: Dict[str, float] = {}
+        # Written commands are ordered by deadline, they move to the end when written
+        self._commands: Dict[str, PendingCommand] = {}
+        self._command_timer: Optional[asyncio.TimerHandle] = None
+        self._retry_tokens = float(RETRY_BURST)
+        self._retry_updated = 0.0
         self._shutdown = False
+        self._synced = False
+        self._available = False
+        self._project_validated = False
+
+    @property
+    def available(self) -> bool:
+        """Return True while logged in and the device values are in sync."""
+        return self._available
+
+    def _set_state(self, state: State) -> None:
+        """Change the connection state and notify listeners if availability changed."""
+        self.state = state
+        if state != State.LOGGED_IN:
+            self._synced = False
+        self._update_available()
+
+    def _update_available(self) -> None:
+        """Notify the connection listeners when availability changes."""
+        available = self.state == State.LOGGED_IN and self._synced
+        if available != self._available:
+            self._available = available
+            for callback in list(self._connection_listeners):
+                callback()
 
     def get_device_name(self, device_id: str) -> Optional[str]:
-        if device_id not in self.devices:
+        device = self.devices.get(device_id)
+        if device is None:
             return None
-        return self.devices[device_id].get("name")
+        return device.name
 
     def get_device_type(self, device_id: str) -> Optional[str]:
         """Get device type."""
-        if device_id not in self.devices:
+        device = self.devices.get(device_id)
+        if device is None:
             return None
-        return self.devices[device_id].get("type")
+        return device.type.value
 
     def get_slot_id(self, device_id: str, slot: SlotTypeEnum) -> Optional[str]:
         """Get slot id."""
-        if device_id not in self.devices:
+        device = self.devices.get(device_id)
+        if device is None or slot not in device.slots:
             return None
-        return self.devices[device_id].get(f"{slot.value}_id")
+        return device.slots[slot].tag
 
-    def get_slot_val(self, device_id: str, slot: SlotTypeEnum) -> Optional[str]:
+    def get_slot_val(self, device_id: str, slot: SlotTypeEnum) -> Optional[Value]:
         """Get slot value."""
-        if device_id not in self.devices:
+        device = self.devices.get(device_id)
+        if device is None or slot not in device.slots:
             return None
-        return self.devices[device_id].get(f"{slot.value}_val")
+        return device.slots[slot].value
 
-    def get_device(self, device_id: str) -> Optional[dict]:
-        if device_id not in self.devices:
-            return None
-        return self.devices[device_id]
+    def get_device(self, device_id: str) -> Optional[Device]:
+        return self.devices.get(device_id)
 
-    def get_devices(self, type: DeviceTypeEnum) -> Optional[dict]:
+    def get_devices(self, type: DeviceTypeEnum) -> Optional[Dict[str, Device]]:
         """Get list of devices by type."""
         if type:
-            return {id: device for id, device in self.devices.items() if device["type"] == type.value}
+            return {id: device for id, device in self.devices.items() if device.type is type}
         else:
             return None
 
-    # INFO: This is a stupid hack to get around the fact that the client doesn't update the device values
-    def set_slot_val(self, device_id: str, slot: SlotTypeEnum, value: str) -> None:
-        """Set slot value."""
-        if device_id not in self.devices:
-            return
-        self.devices[device_id][f"{slot.value}_val"] = value
+    def subscribe_connection(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Call back whenever the client becomes available or unavailable."""
+        return self._subscribe_list(self._connection_listeners, callback)
 
-    async def connect(self, *, retry: bool = True) -> None:
-        """Connect to the Gira HomeServer."""
-        while not self._shutdown:
-            try:
-                self._reader, self._writer = await asyncio.open_connection(
-                    self.host, self.port
+    def subscribe_project(
+        self, callback: Callable[[ProjectDiff], None]
+    ) -> Callable[[], None]:
+        """Call back with the difference whenever a discovery changed the project."""
+        return self._subscribe_list(self._project_listeners, callback)
+
+    def subscribe_new_tags(
+        self, callback: Callable[[str, Value], None]
+    ) -> Callable[[], None]:
+        """Call back once with (tag, value) for every tag that no device or listener uses."""
+        return self._subscribe_list(self._new_tag_listeners, callback)
+
+    def subscribe_events(
+        self, subscriptions: EventSubscriptions, callback: Callable[[str, Value], None]
+    ) -> Callable[[], None]:
+        """Call back with (tag, value) for every telegram on a subscribed tag.
+
+        Unlike tag listeners this sees repeated values, such as the same
+        scene number sent twice, only limited by the rate of each entry.
+        """
+        self._event_tags = subscriptions if subscriptions else None
+        self._event_listener = callback
+
+        def unsubscribe() -> None:
+            if self._event_listener is callback:
+                self._event_tags = None
+                self._event_listener = None
+
+        return unsubscribe
+
+    @staticmethod
+    def _subscribe_list(listeners: list, callback: Callable) -> Callable[[], None]:
+        """Register a listener in a plain list and return its remove function."""
+        listeners.append(callback)
+
+        def unsubscribe() -> None:
+            if callback in listeners:
+                listeners.remove(callback)
+
+        return unsubscribe
+
+    def subscribe_device(
+        self, device_id: str, callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Call back whenever a slot of the device changes, returns an unsubscribe function."""
+        return self._subscribe(self._device_listeners, device_id, callback)
+
+    def subscribe_tag(
+        self, connection_id: str, callback: Callable[[str, Value], None]
+    ) -> Callable[[], None]:
+        """Call back with (tag, value) whenever the tag changes, returns an unsubscribe function."""
+        return self._subscribe(self._tag_listeners, connection_id, callback)
+
+    @staticmethod
+    def _subscribe(listeners: dict, key: str, callback: Callable) -> Callable[[], None]:
+        """Register a listener under the key and return its remove function."""
+        listeners.setdefault(key, []).append(callback)
+
+        def unsubscribe() -> None:
+            callbacks = listeners.get(key)
+            if callbacks and callback in callbacks:
+                callbacks.remove(callback)
+                if not callbacks:
+                    del listeners[key]
+
+        return unsubscribe
+
+    def _set_tag_value(self, connection_id: str, raw: str) -> None:
+        """Decode a value received from the server and apply it to its tag."""
+        value = decode_value(raw)
+        command = self._commands.get(connection_id)
+        if command is not None:
+            # Every written frame is answered by one report on its tag
+            if command.unanswered:
+                command.unanswered -= 1
+            echoed = not value_changed(command.expected, value)
+            if command.deadline is None or (command.unanswered and not echoed):
+                # The answer to an older write, keep showing our value
+                command.previous = value
+                return
+            # The answer to our write, even if the server rounded the value
+            # or a change made on the bus overtook it
+            del self._commands[connection_id]
+            self.metrics.commands_confirmed += 1
+            if not echoed:
+                _LOGGER.debug(
+                    "Command %s=%s answered with %s", connection_id, command.value, raw
                 )
-                self.state = State.CONNECTED
-                await self._login()
-                await self.discover_devices()
-                break
-            except asyncio.TimeoutError as err:
-                _LOGGER.error("Timeout connecting to Gira HomeServer: %s", err)
-                self.state = State.DISCONNECTED
-                if not retry:
-                    raise ConfigEntryNotReady from err
-
-            except Exception as err:
-                _LOGGER.error("Failed to connect to Gira HomeServer: %s", err)
-                self.state = State.DISCONNECTED
-                if not retry:
-                    raise ConfigEntryNotReady from err
-
-            if retry:
-                await asyncio.sleep(3)
-            else:
-                break
+        self._apply_value(connection_id, value)
 
-        # Start monitor after successful login
-        if self.state == State.LOGGED_IN:
-            asyncio.create_task(self._monitor())
-            return
+    def _apply_value(self, connection_id: str, value: Value, notify: bool = True) -> List[str]:
+        """Store a decoded value in every slot wired to the connection tag.
+
+        Values that repeat the current value, or move an analog slot by no
+        more than its tolerance, are counted and dropped before any
+        listener runs. Returns the ids of the changed devices, which are
+        only notified here if notify is set.
+        """
+        slots = self._tags.get(connection_id)
+        listeners = self._tag_listeners.get(connection_id)
+        if slots:
+            changed = []
+            for slot in slots:
+                slot_value = value if slot.transform is None else slot.transform.to_value(value)
+                if value_changed(slot.value, slot_value, self._tolerances.get(slot.type, 0.0)):
+                    changed.append((slot, slot_value))
+        elif listeners:
+            previous = self._tag_values.get(connection_id)
+            changed = previous is None or value_changed(previous, value)
+            self._tag_values[connection_id] = value
         else:
-            _LOGGER.error("Login failed")
+            # Unused tags cost a set lookup, they are offered only once
+            if self._new_tag_listeners and connection_id not in self._offered_tags:
+                self._offered_tags.add(connection_id)
+                for callback in list(self._new_tag_listeners):
+                    callback(connection_id, value)
+            return []
+
+        if not changed:
+            self.metrics.updates_suppressed += 1
+            return []
+        self.metrics.updates_forwarded += 1
 
+        for callback in listeners or ():
+            callback(connection_id, value)
+        if not slots:
+            return []
+
+        for slot, slot_value in changed:
+            slot.value = slot_value
+            _LOGGER.debug(
+                "Device %s (%s) connection %s updated: %s",
+                slot.device_id,
+                slot.type.value,
+                connection_id,
+                slot_value
+            )
+
+        # Notify each device once, even if several of its slots share the tag
+        if len(changed) == 1:
+            device_ids = [changed[0][0].device_id]
+        else:
+            device_ids = list(dict.fromkeys(slot.device_id for slot, _ in changed))
+        if notify:
+            for device_id in device_ids:
+                self._notify_device(device_id)
+        return device_ids
+
+    def _notify_device(self, device_id: str) -> None:
+        """Call the listeners registered for a device."""
+        for callback in self._device_listeners.get(device_id, ()):
+            callback()
+
+    def start(self) -> None:
+        """Connect in the background and keep the connection alive."""
+        if self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise())
 
     async def disconnect(self) -> None:
         """Disconnect from the Gira HomeServer."""
         self._shutdown = True
+        if self._supervisor:
+            self._supervisor.cancel()
+            try:
+                await self._supervisor
+            except asyncio.CancelledError:
+                pass
+            self._supervisor = None
+        if self.command_connection is not None:
+            await self.command_connection.stop()
+        await self._close_connection()
+        if self._owns_session and self._session:
+            await self._session.close()
+            self._session = None
+
+    async def _establish(self) -> None:
+        """Open the connection, log in and sync the device values."""
+        await self._open_connection()
+        await self._login()
+        if not self.devices:
+            await self.discover_devices()
+        elif not await self.fetch_device_values():
+            raise ConnectionError("Failed to fetch device values")
+        self._synced = True
+        self._update_available()
+
+    async def _supervise(self) -> None:
+        """Connect, and reconnect with backoff whenever the connection is lost."""
+        attempt = 0
+        reconnecting = False
+        connected_at = 0.0
+        while not self._shutdown:
+            if self.state != State.LOGGED_IN:
+                if attempt:
+                    delay = self._backoff_delay(attempt - 1)
+                    _LOGGER.debug("Connection attempt %s in %.1f seconds", attempt + 1, delay)
+                    await asyncio.sleep(delay)
+                try:
+                    await self._establish()
+                except Exception as err:
+                    _LOGGER.warning("Connection attempt %s failed: %s", attempt + 1, err)
+                    await self._close_connection()
+                    attempt += 1
+                    continue
+                _LOGGER.info("Connected to Gira HomeServer")
+                connected_at = asyncio.get_running_loop().time()
+                if reconnecting:
+                    self.metrics.reconnects += 1
+                if self.command_connection is not None:
+                    self.command_connection.start()
+
+            if not self._project_validated:
+                # Check a cached project against the server once connected
+                try:
+                    await self.discover_devices()
+                except Exception as err:
+                    _LOGGER.warning("Failed to revalidate project: %s", err)
+
+            if self._dispatcher:
+                # The dispatcher only returns once the socket is closed
+                await asyncio.wait((self._dispatcher,))
+            if self._shutdown:
+                break
+
+            _LOGGER.warning("Lost connection to Gira HomeServer, reconnecting")
+            await self._close_connection()
+            # A connection that keeps dropping right after login backs off further
+            if asyncio.get_running_loop().time() - connected_at < STABLE_CONNECTION:
+                attempt += 1
+            else:
+                attempt = 1
+            reconnecting = True
+
+    @staticmethod
+    def _backoff_delay(attempt: int) -> float:
+        """Return a jittered exponential backoff delay for the given attempt."""
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_MIN_DELAY * 2 ** min(attempt, 16))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _open_connection(self) -> None:
+        """Open the socket and start the task that owns its reader."""
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port
+        )
+        self._frames = FrameReader(self._reader)
+        self._set_state(State.CONNECTED)
+        self._dispatcher = asyncio.create_task(self._dispatch_frames())
+        self._write_task = asyncio.create_task(self._process_writes())
+
+    async def _close_connection(self) -> None:
+        """Stop the dispatcher and close the socket."""
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+        if self._write_task:
+            self._write_task.cancel()
+            try:
+                await self._write_task
+            except asyncio.CancelledError:
+                pass
+            self._write_task = None
+
+        # Commands queued for a dead connection are not replayed later, the
+        # value dump after reconnecting replaces their optimistic values
+        if self._write_timer:
+            self._write_timer.cancel()
+            self._write_timer = None
+        self._pending_writes.clear()
+        if self._command_timer:
+            self._command_timer.cancel()
+            self._command_timer = None
+        self._commands.clear()
+
         if self._writer:
             self._writer.close()
             try:
@@ -121,117 +656,401 @@ class GiraClient:
                 _LOGGER.debug("Successfully disconnected from Gira HomeServer")
             except Exception:
                 _LOGGER.exception("Error during disconnect")
-        self.state = State.DISCONNECTED
+            self._writer = None
+
+        self._reader = None
+        self._frames = None
+        self._set_state(State.DISCONNECTED)
+
+    async def probe(self, timeout: float = PROBE_TIMEOUT) -> None:
+        """Log in once to check the host and credentials, then disconnect.
+
+        Nothing is downloaded or fetched. Raises GiraConnectionError,
+        GiraAuthError or GiraProtocolError.
+        """
+        try:
+            async with asyncio.timeout(timeout):
+                try:
+                    await self._open_connection()
+                except OSError as err:
+                    raise GiraConnectionError(
+                        f"Cannot reach {self.host}:{self.port}: {err}"
+                    ) from err
+                try:
+                    await self._login()
+                except ConnectionError as err:
+                    raise GiraProtocolError(f"Login aborted: {err}") from err
+        except TimeoutError as err:
+            if self.state == State.DISCONNECTED:
+                raise GiraConnectionError(
+                    f"Timeout connecting to {self.host}:{self.port}"
+                ) from err
+            raise GiraProtocolError("Timeout waiting for a login response") from err
+        finally:
+            await self._close_connection()
 
     async def _login(self):
-        await self._write("GET /QUAD/LOGIN \r\n\r\n")
-        while not self._shutdown:
-            action, messages = await self._read()
-
-            if action == 100:
-                """Request connection"""
-                await self._write(f"90|{self.username}|")
-            elif action == 91:
-                """Generate hash"""
-                salt = messages[0][0]
-                hash = self._generate_hash(self.username, self.password, salt)
-                await self._write(f"92|{hash}|")
-            elif action == 93:
-                """Login successful"""
-                self.state = State.LOGGED_IN
-                self._token = str(messages[0][0])
-                _LOGGER.info("Successfully logged in to Gira HomeServer")
-                break
-            else:
-                _LOGGER.warning(f"Unhandled action during login: {action}")
+        started = time.perf_counter()
+        await self._request("GET /QUAD/LOGIN \r\n\r\n", 100)
 
-    async def _monitor(self) -> None:
-        """Monitor for updates from the server."""
-        while not self._shutdown:
-            try:
-                action, messages = await self._read()
-                if action != 1 or not messages:
-                    continue
+        # Request connection and answer the salt with our hash
+        messages = await self._request(f"90|{self.username}|", 91)
+        if not messages or not messages[0]:
+            raise GiraProtocolError("Login response without salt")
+        salt = messages[0][0]
+        hash = self._generate_hash(self.username, self.password, salt)
+        try:
+            messages = await self._request(f"92|{hash}|", 93)
+        except ConnectionError as err:
+            # The HomeServer hangs up on a wrong hash instead of answering
+            raise GiraAuthError("Invalid username or password") from err
+        if not messages or not messages[0]:
+            raise GiraProtocolError("Login response without token")
 
-                for message in messages:
-                    if len(message) != 3:
-                        continue
-
-                    connection_id, value = message[0], message[1]
-                    for device_id, device in self.devices.items():
-                        for key, device_connection_id in device.items():
-                            if key.endswith("_id") and device_connection_id == connection_id:
-                                value_key = key.replace("_id", "_val")
-                                device[value_key] = value
-                                _LOGGER.debug(
-                                    "Device %s (%s) connection %s updated: %s",
-                                    device_id,
-                                    value_key,
-                                    connection_id,
-                                    value
-                                )
-            except Exception:
-                _LOGGER.exception("Error in monitor loop")
-                await asyncio.sleep(1)
+        self._set_state(State.LOGGED_IN)
+        self._token = str(messages[0][0])
+        self.metrics.login_time = time.perf_counter() - started
+        _LOGGER.info("Successfully logged in to Gira HomeServer")
 
-    async def _read(self):
-        """Safely read data using a lock to prevent concurrent read access."""
-        if not self._reader:
-            raise ConnectionError("Reader is not initialized")
+    async def _request(self, data: str, action: int, timeout: float = REQUEST_TIMEOUT) -> list:
+        """Send a command and wait for the dispatcher to route its response."""
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(action, deque())
+        waiters.append(future)
+        try:
+            await self._write(data)
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if future in waiters:
+                waiters.remove(future)
 
-        valid_actions = [1, 2, 91, 93, 100]
-        async with self._lock:
-            data = await self._reader.read(2048)
-            if not data:
-                raise ConnectionError("No data received")
+    async def _dispatch_frames(self) -> None:
+        """Read every frame from the server and route it by action code."""
+        metrics = self.metrics
+        frames = self._frames
+        bytes_read = 0
+        try:
+            async for frame in frames:
+                metrics.frames_received += 1
+                metrics.bytes_received += frames.bytes_read - bytes_read
+                bytes_read = frames.bytes_read
+                self.dispatch_frame(frame)
+            _LOGGER.warning("Connection closed by Gira HomeServer")
+        finally:
+            self._set_state(State.DISCONNECTED)
+            for waiters in self._waiters.values():
+                while waiters:
+                    future = waiters.popleft()
+                    if not future.done():
+                        future.set_exception(ConnectionError("Connection lost"))
 
-            raw_messages = data.decode().strip("\x00").split("|")
-            if not raw_messages or len(raw_messages) < 3:
-                raise ConnectionError("Malformed response data")
+    def dispatch_frame(self, frame: str) -> None:
+        """Route a single frame received from the server by its action code."""
+        started = time.perf_counter()
+        if self.recorder is not None:
+            self.recorder.record(RX, frame)
+        try:
+            action, messages = self._parse_frame(frame)
+            if action == 1:
+                self._handle_values(messages, self._event_tags)
+                self.metrics.dispatch_latency_ms.observe(
+                    (time.perf_counter() - started) * 1000
+                )
+            elif action in RESPONSE_ACTIONS:
+                self._handle_response(action, messages)
+        except Exception:
+            _LOGGER.exception("Error dispatching frame: %s", frame)
 
-            try:
-                action = int(raw_messages[0])
-                if action not in valid_actions:
-                    return 0, []
-            except ValueError:
-                _LOGGER.warning("Invalid action received: %s", raw_messages[0])
-                return 0, []  # Return safe default values
+    def _handle_response(self, action: int, messages: list) -> None:
+        """Hand a response frame to the oldest request waiting for it."""
+        if action == 2:
+            # Value dumps are applied even if nobody is waiting for them
+            self._handle_values(messages)
 
-            _LOGGER.debug("Read %s bytes, data: %s", len(data), data)
-            messages = [
-                raw_messages[i:i+3] for i in range(1, len(raw_messages), 3)
-            ]
-            return action, messages
+        waiters = self._waiters.get(action)
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                future.set_result(messages)
+                return
 
+        if action != 2:
+            _LOGGER.debug("Unexpected response with action %s", action)
+
+    def _handle_values(
+        self, messages: list, events: Optional[EventSubscriptions] = None
+    ) -> None:
+        """Apply connection_id|value|flag triples from an update or value dump.
+
+        Telegrams on tags subscribed in events are also passed to the event
+        listener, before any deduplication.
+        """
+        now = time.monotonic() if events is not None else 0.0
+        for message in messages:
+            if len(message) != 3:
+                # The trailing separator leaves an empty remainder
+                if message != [""]:
+                    self.metrics.messages_dropped += 1
+                continue
+
+            if events is not None:
+                allowed = events.allow(message[0], now)
+                if allowed:
+                    self.metrics.events_fired += 1
+                    self._event_listener(message[0], decode_value(message[1]))
+                elif allowed is not None:
+                    self.metrics.events_rate_limited += 1
+            self._set_tag_value(message[0], message[1])
+
+    def _handle_command_echoes(self, frame: str) -> None:
+        """Apply echoes received on the command connection.
+
+        Only tags with an outstanding command are looked at, every other
+        telegram is handled when it arrives on the event connection.
+        """
+        if not self._commands or not frame.startswith("1|"):
+            return
+        parts = frame.split("|")
+        for i in range(1, len(parts) - 1, 3):
+            if parts[i] in self._commands:
+                self._set_tag_value(parts[i], parts[i + 1])
+
+    def _parse_frame(self, frame: str):
+        """Split a frame into its action code and message triples."""
+        raw_messages = frame.split("|")
+        if len(raw_messages) < 3:
+            _LOGGER.warning("Malformed frame received: %s", frame)
+            self.metrics.frames_malformed += 1
+            return 0, []
+
+        try:
+            action = int(raw_messages[0])
+            if action not in VALID_ACTIONS:
+                self.metrics.frames_dropped += 1
+                return 0, []
+        except ValueError:
+            _LOGGER.warning("Invalid action received: %s", raw_messages[0])
+            self.metrics.frames_malformed += 1
+            return 0, []  # Return safe default values
+        self.metrics.frames_by_action[action] += 1
+
+        _LOGGER.debug("Read frame of %s chars, data: %s", len(frame), frame)
+        messages = [
+            raw_messages[i:i+3] for i in range(1, len(raw_messages), 3)
+        ]
+        return action, messages
 
     async def _write(self, data):
+        await self._write_frames([data])
+
+    async def _write_frames(self, frames: List[str]) -> None:
+        """Send several frames with a single socket write."""
+        if self._can_write():
+            await self._write_data(self._encode_frames(frames))
+
+    async def _send_commands(self, frames: List[str]) -> None:
+        """Send queued values on the command connection if it is up."""
+        connection = self.command_connection
+        if connection is None:
+            await self._write_frames(frames)
+            return
+        data = self._encode_frames(frames)
+        if await connection.write(data):
+            return
+        self.metrics.command_fallbacks += 1
+        if self._can_write():
+            await self._write_data(data)
+
+    def _can_write(self) -> bool:
+        """Return True if the event connection can take frames."""
         if not self._writer:
             _LOGGER.error("Writer is not initialized")
-            return
+            return False
 
         if self.state not in [State.CONNECTED, State.LOGGED_IN]:
             _LOGGER.error("Client is not connected")
-            return
+            return False
+        return True
+
+    def _encode_frames(self, frames: List[str]) -> bytes:
+        """Record and count outgoing frames and return them NUL terminated."""
+        if self.recorder is not None:
+            for frame in frames:
+                self.recorder.record(TX, frame)
+        data = "".join(f"{frame}\x00" for frame in frames).encode()
+        self.metrics.frames_sent += len(frames)
+        self.metrics.bytes_sent += len(data)
+        return data
 
+    async def _write_data(self, data: bytes) -> None:
+        """Write encoded frames to the event connection."""
         try:
-            self._writer.write((data + "\x00").encode())
+            self._writer.write(data)
             await self._writer.drain()
         except Exception:
             _LOGGER.exception("Error sending message")
 
-    async def discover_devices(self):
-        """Discover devices from the Gira HomeServer."""
+    def _queue_value(self, connection_id: str, value: str) -> None:
+        """Queue a value for a tag, replacing any value still waiting to be sent."""
+        self._pending_writes[connection_id] = value
+        self._write_event.set()
+
+    async def _process_writes(self) -> None:
+        """Send queued values, batching frames and rate limiting each tag."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._write_event.wait()
+            self._write_event.clear()
+
+            now = loop.time()
+            frames = []
+            next_due = None
+            for connection_id, value in list(self._pending_writes.items()):
+                due = self._last_sent.get(connection_id, 0.0) + self.command_interval
+                if due > now:
+                    # Keep it queued, later values for the tag still replace it
+                    next_due = due if next_due is None else min(next_due, due)
+                    continue
+                del self._pending_writes[connection_id]
+                self._last_sent[connection_id] = now
+                frames.append(f"1|{connection_id}|{value}")
+                self._command_written(connection_id, value, now)
+
+            if next_due is not None:
+                if self._write_timer:
+                    self._write_timer.cancel()
+                self._write_timer = loop.call_at(next_due, self._write_event.set)
+
+            if frames:
+                _LOGGER.debug("Sending %s queued values", len(frames))
+                await self._send_commands(frames)
+
+    def load_project(self, data: dict) -> None:
+        """Restore a device map previously returned by export_project."""
+        self.devices = {
+            device_id: Device.from_dict(device_id, device, self._config)
+            for device_id, device in data["devices"].items()
+        }
+        self._tags = build_tag_index(self.devices)
+        self.project_hash = data.get("hash")
+        self._project_etag = data.get("etag")
+        self._project_modified = data.get("modified")
+        _LOGGER.debug("Loaded %s cached devices", len(self.devices))
+
+    def export_project(self) -> dict:
+        """Return the parsed project in a JSON serializable form."""
+        return {
+            "hash": self.project_hash,
+            "etag": self._project_etag,
+            "modified": self._project_modified,
+            "devices": {
+                device_id: device.to_dict() for device_id, device in self.devices.items()
+            },
+        }
+
+    async def discover_devices(self) -> Optional[ProjectDiff]:
+        """Discover devices from the Gira HomeServer.
+
+        Returns the difference to the known devices, or None if the project is unchanged.
+        """
         if self.state != State.LOGGED_IN or not self._token:
             _LOGGER.error("Not connected")
-            return
+            return None
 
         _LOGGER.debug("Discovering devices...")
         url = f"http://{self.host}:{self.port}/quad/client/client_project.xml?{self._token}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                xml = await response.text()
-                self.devices = Parser().parse(xml)
-                await self.fetch_device_values()
+
+        # Let the server skip the download if the project is unchanged
+        headers = {"Accept-Encoding": "gzip, deflate"}
+        if self.devices:
+            if self._project_etag:
+                headers["If-None-Match"] = self._project_etag
+            if self._project_modified:
+                headers["If-Modified-Since"] = self._project_modified
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+
+        started = time.perf_counter()
+        parse_time = 0.0
+        async with self._session.get(url, headers=headers, timeout=PROJECT_TIMEOUT) as response:
+            if response.status == HTTPStatus.NOT_MODIFIED:
+                _LOGGER.debug("Project not modified")
+                self._project_validated = True
+                return None
+            response.raise_for_status()
+            etag = response.headers.get("ETag")
+            modified = response.headers.get("Last-Modified")
+            if response.content_length and response.content_length > PROJECT_MAX_SIZE:
+                raise aiohttp.ClientPayloadError(
+                    f"Project size {response.content_length} exceeds {PROJECT_MAX_SIZE} bytes"
+                )
+
+            # Parse while downloading, the CPU heavy part runs in an executor
+            loop = asyncio.get_running_loop()
+            parser = Parser(matcher=self._matcher)
+            checksum = hashlib.sha256()
+            size = 0
+            async for chunk in response.content.iter_chunked(PROJECT_CHUNK_SIZE):
+                size += len(chunk)
+                if size > PROJECT_MAX_SIZE:
+                    raise aiohttp.ClientPayloadError(
+                        f"Project exceeds {PROJECT_MAX_SIZE} bytes"
+                    )
+                checksum.update(chunk)
+                parse_started = time.perf_counter()
+                await loop.run_in_executor(None, parser.feed, chunk)
+                parse_time += time.perf_counter() - parse_started
+            parse_started = time.perf_counter()
+            devices = await loop.run_in_executor(None, parser.close)
+            parse_time += time.perf_counter() - parse_started
+
+        self.metrics.project_parse_time = parse_time
+        self.metrics.project_download_time = time.perf_counter() - started - parse_time
+
+        project_hash = checksum.hexdigest()
+        self._project_etag = etag
+        self._project_modified = modified
+        self._project_validated = True
+        if self.devices and project_hash == self.project_hash:
+            _LOGGER.debug("Project checksum unchanged")
+            return None
+
+        diff = diff_devices(self.devices, devices)
+
+        # Carry live values over to every tag that was already known
+        old_tags = self._tags
+        for tag, slots in parser.tags.items():
+            known = old_tags.get(tag)
+            if known is None:
+                diff.new_tags.add(tag)
+                continue
+            value = known[0].value
+            for slot in slots:
+                slot.value = value
+
+        self.devices = devices
+        self._tags = parser.tags
+        self.project_hash = project_hash
+        _LOGGER.debug(
+            "Project changed: %s added, %s removed, %s changed, %s new tags",
+            len(diff.added),
+            len(diff.removed),
+            len(diff.changed),
+            len(diff.new_tags),
+        )
+
+        # Let entities of rewired or removed devices pick up the change
+        for device_id in diff.changed + diff.removed:
+            self._notify_device(device_id)
+
+        # The server only offers a full dump, so skip it if no tag is new
+        if diff.new_tags:
+            await self.fetch_device_values()
+
+        for callback in list(self._project_listeners):
+            callback(diff)
+        return diff
 
     async def fetch_device_values(self) -> bool:
         if self.state != State.LOGGED_IN:
@@ -239,28 +1058,10 @@ class GiraClient:
             return False
 
         try:
-            await self._write("94||") # Request device values
-            action, messages = await self._read()
-            if action != 2 or not messages:
-                return False
-
-            for message in messages:
-                if len(message) != 3:
-                    continue
-
-                connection_id, value = message[0], message[1]
-                for device_id, device in self.devices.items():
-                    for key, device_connection_id in device.items():
-                        if key.endswith("_id") and device_connection_id == connection_id:
-                            value_key = key.replace("_id", "_val")
-                            device[value_key] = value
-                            _LOGGER.debug(
-                                "Device %s (%s) connection %s updated: %s",
-                                device_id,
-                                value_key,
-                                connection_id,
-                                value
-                            )
+            # The dispatcher applies the 2| dump, we only wait for it to arrive
+            started = time.perf_counter()
+            await self._request("94||", 2)
+            self.metrics.fetch_time = time.perf_counter() - started
             return True
         except Exception:
             _LOGGER.exception("Error fetching device values")
@@ -276,32 +1077,137 @@ class GiraClient:
             _LOGGER.warning("Device %s not found", device_id)
             return False
 
+        # Values are in slot units, the tag expects its raw value
+        for slot in self.devices[device_id].slots.values():
+            if slot.tag == connection_id and slot.transform is not None:
+                value = encode_value(slot.transform.to_raw(decode_value(value)))
+                break
+
         try:
-            device = self.devices[device_id]
-            await self._write(f"1|{connection_id}|{value}")
-
-            # Update only the matching slot's value
-            for key, device_connection_id in device.items():
-                if key.endswith("_id") and device_connection_id == connection_id:
-                    value_key = key.replace("_id", "_val")
-                    device[value_key] = value
-                    break
+            self._queue_value(connection_id, value)
+            self._track_command(connection_id, value)
+
+            # Update every slot wired to this connection, not just this device
+            self._apply_value(connection_id, decode_value(value))
             return True
         except Exception:
             _LOGGER.exception("Error updating device value")
             return False
 
-    def _generate_hash(self, username, password, salt):
-        salt = [ord(c) for c in salt]
-        arr1 = "".join(
-            chr(salt[i] ^ 92 if i < len(salt) else 92) for i in range(64)
-        )
-        arr2 = "".join(
-            chr(salt[i] ^ 54 if i < len(salt) else 54) for i in range(64)
-        )
-        hash1 = (
-            hashlib.md5((arr2 + username + password).encode())
-            .hexdigest()
-            .upper()
+    async def update_values(self, values: Iterable[Tuple[str, str]]) -> bool:
+        """Write raw values to several tags at once.
+
+        The values are sent in a single batch and applied locally before any
+        device listener runs, so entities never show a half applied state.
+        """
+        if self.state != State.LOGGED_IN:
+            _LOGGER.error("Not connected")
+            return False
+
+        changed: Dict[str, None] = {}
+        for connection_id, value in values:
+            value = str(value)
+            self._queue_value(connection_id, value)
+            self._track_command(connection_id, value)
+            changed.update(
+                dict.fromkeys(self._apply_value(connection_id, decode_value(value), notify=False))
+            )
+
+        for device_id in changed:
+            self._notify_device(device_id)
+        return True
+
+    def _track_command(self, connection_id: str, value: str) -> None:
+        """Expect the server to report a queued value once it is written."""
+        previous = self._commands.pop(connection_id, None)
+        unanswered = 0
+        if previous is not None:
+            # A newer command for the tag replaces the one still in flight,
+            # the reports for its written frames are still to come
+            last_confirmed = previous.previous
+            unanswered = previous.unanswered
+        else:
+            slots = self._tags.get(connection_id)
+            if not slots:
+                last_confirmed = self._tag_values.get(connection_id)
+            elif slots[0].transform is None:
+                last_confirmed = slots[0].value
+            else:
+                last_confirmed = slots[0].transform.to_raw(slots[0].value)
+        self._commands[connection_id] = PendingCommand(
+            connection_id,
+            value,
+            decode_value(value),
+            last_confirmed,
+            unanswered=unanswered,
         )
-        return hashlib.md5((arr1 + hash1).encode()).hexdigest().upper()
+
+    def _command_written(self, connection_id: str, value: str, now: float) -> None:
+        """Start the deadline of a command once its frame is written.
+
+        Values can wait in the write queue for up to the command interval,
+        which must not count against the time the server has to answer.
+        """
+        command = self._commands.pop(connection_id, None)
+        if command is None:
+            return
+        command.unanswered += 1
+        if command.value == value:
+            command.deadline = now + COMMAND_TIMEOUT
+        # Keep the written commands ordered by deadline
+        self._commands[connection_id] = command
+        if self._command_timer is None:
+            self._schedule_command_check()
+
+    def _schedule_command_check(self) -> None:
+        """Wake up at the deadline of the oldest written command."""
+        self._command_timer = None
+        for command in self._commands.values():
+            if command.deadline is not None:
+                self._command_timer = asyncio.get_running_loop().call_at(
+                    command.deadline, self._check_commands
+                )
+                break
+
+    def _check_commands(self) -> None:
+        """Retry or roll back every command whose tag was not reported in time."""
+        now = asyncio.get_running_loop().time()
+        for command in list(self._commands.values()):
+            if command.deadline is None:
+                # Still queued, its deadline starts when it is written
+                continue
+            if command.deadline > now:
+                break
+            del self._commands[command.tag]
+
+            if command.retries < COMMAND_RETRIES and self._take_retry_token(now):
+                _LOGGER.debug("Command %s=%s not confirmed, retrying", command.tag, command.value)
+                command.retries += 1
+                # The frames written so far are considered lost
+                command.deadline = None
+                command.unanswered = 0
+                self._commands[command.tag] = command
+                self._queue_value(command.tag, command.value)
+                self.metrics.commands_retried += 1
+                continue
+
+            _LOGGER.warning(
+                "Command %s=%s was not confirmed by the HomeServer", command.tag, command.value
+            )
+            self.metrics.commands_rolled_back += 1
+            if command.previous is not None:
+                self._apply_value(command.tag, command.previous)
+        self._schedule_command_check()
+
+    def _take_retry_token(self, now: float) -> bool:
+        """Return True if the retry rate limit allows another retry."""
+        elapsed = now - self._retry_updated
+        self._retry_updated = now
+        self._retry_tokens = min(RETRY_BURST, self._retry_tokens + elapsed * RETRY_RATE)
+        if self._retry_tokens < 1:
+            return False
+        self._retry_tokens -= 1
+        return True
+
+    def _generate_hash(self, username, password, salt):
+        return generate_hash(username, password, salt)
@@ -15,6 +15,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .client import GiraClient
+from .entity import GiraEntity, async_setup_gira_entities
 from .const import DOMAIN
 from .devices import DeviceTypeEnum, SlotTypeEnum
 
@@ -26,23 +27,17 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Gira HomeServer light platform."""
-    client = hass.data[DOMAIN][config_entry.entry_id]
+    async_setup_gira_entities(
+        hass, config_entry, async_add_entities, {DeviceTypeEnum.CLIMATE: GiraClimate}
+    )
 
-    entities = []
-    for device_id in client.get_devices(DeviceTypeEnum.CLIMATE).keys():
-        entities.append(GiraClimate(client, device_id))
-
-    async_add_entities(entities)
-
-class GiraClimate(ClimateEntity):
+class GiraClimate(GiraEntity, ClimateEntity):
     """Representation of a Gira HomeServer light."""
 
     def __init__(self, client: GiraClient, device_id: str):
         """Initialize the light."""
         self._client = client
         self._device_id = device_id
-        self._target_id = client.get_slot_id(device_id, SlotTypeEnum.CLIMATE_TARGET)
-        self._current_id = client.get_slot_id(device_id, SlotTypeEnum.CLIMATE_CURRENT)
         self._attr_name = client.get_device_name(device_id)
         self._attr_unique_id = f"{DOMAIN}_climate_{device_id}"
         self._attr_temperature_unit = UnitOfTemperature.CELSIUS
@@ -59,9 +54,6 @@ class GiraClimate(ClimateEntity):
     @property
     def target_temperature(self) -> Optional[float]:
         """Return the temperature we try to reach."""
-        if self._target_id is None:
-            return None
-
         value = self._client.get_slot_val(self._device_id, SlotTypeEnum.CLIMATE_TARGET)
         if value is None:
             return None
@@ -77,7 +69,8 @@ class GiraClimate(ClimateEntity):
 
     async def async_set_temperature(self, **kwargs: Any) -> None:
         """Turn the switch on."""
-        if self._target_id is None:
+        target_id = self._slot_id(SlotTypeEnum.CLIMATE_TARGET)
+        if target_id is None:
             return
         temperature = kwargs.get(ATTR_TEMPERATURE)
-        await self._client.update_device_value(self._device_id, self._target_id, str(temperature))
+        await self._client.update_device_value(self._device_id, target_id, str(temperature))
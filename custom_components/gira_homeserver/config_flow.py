@@ -2,17 +2,38 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import Any, Callable
 
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
-
-from .client import GiraClient, State
-from .const import DOMAIN
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
+
+from .client import GiraAuthError, GiraClient, GiraError
+from .const import (
+    CONF_COMMAND_CONNECTION,
+    CONF_COMMAND_INTERVAL,
+    CONF_COVER_TRAVEL_TIMES,
+    CONF_DISCOVER_TAGS,
+    CONF_EVENT_TAGS,
+    CONF_LIGHT_GROUPS,
+    CONF_RECORD_TRAFFIC,
+    CONF_SLOT_MAPPING,
+    CONF_TAGS,
+    DEFAULT_COMMAND_INTERVAL,
+    DOMAIN,
+)
+from .devices import load_slot_mapping
+from .options import (
+    load_event_tags,
+    load_groups,
+    load_tag_config,
+    load_travel_times,
+    parse_option,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,6 +46,28 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
+# YAML options and their loaders, an invalid one is reported as invalid_<key>
+YAML_OPTIONS: dict[str, Callable[[Any], Any]] = {
+    CONF_SLOT_MAPPING: load_slot_mapping,
+    CONF_LIGHT_GROUPS: load_groups,
+    CONF_TAGS: load_tag_config,
+    CONF_COVER_TRAVEL_TIMES: load_travel_times,
+    CONF_EVENT_TAGS: load_event_tags,
+}
+
+def _validate_yaml(
+    user_input: dict[str, Any],
+    key: str,
+    loader: Callable[[Any], Any],
+    errors: dict[str, str],
+) -> None:
+    """Record an error for the option if its YAML does not load."""
+    try:
+        parse_option(user_input.get(key), loader)
+    except (HomeAssistantError, ValueError) as err:
+        _LOGGER.debug("Invalid %s: %s", key, err)
+        errors[key] = f"invalid_{key}"
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
     client = GiraClient(
@@ -35,10 +78,11 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     )
 
     try:
-        await client.connect()
-        if client.state != State.LOGGED_IN:
-            raise InvalidAuth
-    except Exception as err:
+        await client.probe()
+    except GiraAuthError as err:
+        raise InvalidAuth from err
+    except GiraError as err:
+        _LOGGER.debug("Probe of %s failed: %s", data[CONF_HOST], err)
         raise CannotConnect from err
     finally:
         await client.disconnect()
@@ -50,6 +94,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> config_entries.ConfigFlowResult:
@@ -72,6 +124,68 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle options for Gira HomeServer."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.ConfigFlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            for key, loader in YAML_OPTIONS.items():
+                _validate_yaml(user_input, key, loader, errors)
+
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = user_input or self._config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_COMMAND_INTERVAL,
+                    default=options.get(CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                vol.Optional(
+                    CONF_COMMAND_CONNECTION,
+                    default=options.get(CONF_COMMAND_CONNECTION, False),
+                ): bool,
+                vol.Optional(
+                    CONF_SLOT_MAPPING,
+                    description={"suggested_value": options.get(CONF_SLOT_MAPPING, "")},
+                ): TextSelector(TextSelectorConfig(multiline=True)),
+                vol.Optional(
+                    CONF_LIGHT_GROUPS,
+                    description={"suggested_value": options.get(CONF_LIGHT_GROUPS, "")},
+                ): TextSelector(TextSelectorConfig(multiline=True)),
+                vol.Optional(
+                    CONF_TAGS,
+                    description={"suggested_value": options.get(CONF_TAGS, "")},
+                ): TextSelector(TextSelectorConfig(multiline=True)),
+                vol.Optional(
+                    CONF_EVENT_TAGS,
+                    description={"suggested_value": options.get(CONF_EVENT_TAGS, "")},
+                ): TextSelector(TextSelectorConfig(multiline=True)),
+                vol.Optional(
+                    CONF_COVER_TRAVEL_TIMES,
+                    description={"suggested_value": options.get(CONF_COVER_TRAVEL_TIMES, "")},
+                ): TextSelector(TextSelectorConfig(multiline=True)),
+                vol.Optional(
+                    CONF_DISCOVER_TAGS,
+                    default=options.get(CONF_DISCOVER_TAGS, False),
+                ): bool,
+                vol.Optional(
+                    CONF_RECORD_TRAFFIC,
+                    default=options.get(CONF_RECORD_TRAFFIC, False),
+                ): bool,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
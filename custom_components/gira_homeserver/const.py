@@ -1,2 +1,32 @@
 """Constants for the Gira Homeserver integration."""
 DOMAIN = "gira_homeserver"
+
+# Dispatcher signal carrying the ids of devices added by a rediscovery
+SIGNAL_DEVICES_ADDED = f"{DOMAIN}_devices_added_{{entry_id}}"
+
+# Parsed project cache
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.{{entry_id}}"
+
+CONF_COMMAND_INTERVAL = "command_interval"
+
+# Minimum time in seconds between two values sent to the same tag
+DEFAULT_COMMAND_INTERVAL = 0.2
+# YAML slot mapping applied on top of the default device config
+CONF_SLOT_MAPPING = "slot_mapping"
+# YAML mapping of light group names to their member device ids
+CONF_LIGHT_GROUPS = "light_groups"
+# Write every frame exchanged with the HomeServer to a file in the config dir
+CONF_RECORD_TRAFFIC = "record_traffic"
+# YAML lists of tags and patterns exposed as sensors and binary sensors
+CONF_TAGS = "tags"
+# Register a disabled sensor for every other tag outside the known devices
+CONF_DISCOVER_TAGS = "discover_tags"
+# YAML mapping of cover device ids to their travel times in seconds
+CONF_COVER_TRAVEL_TIMES = "cover_travel_times"
+# Send commands over a second connection, apart from the event stream
+CONF_COMMAND_CONNECTION = "command_connection"
+# YAML list of tags whose telegrams are fired as events
+CONF_EVENT_TAGS = "event_tags"
+
+EVENT_VALUE = f"{DOMAIN}_value"
@@ -2,7 +2,8 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Optional
+import time
+from typing import Any, Callable, Optional
 
 from homeassistant.components.cover import (
     ATTR_POSITION,
@@ -11,12 +12,15 @@ from homeassistant.components.cover import (
     CoverEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 
-from .const import DOMAIN
+from .const import CONF_COVER_TRAVEL_TIMES, DOMAIN
 from .client import GiraClient
-from .devices import DeviceTypeEnum, SlotTypeEnum
+from .entity import GiraEntity, async_setup_gira_entities
+from .devices import DeviceTypeEnum, SlotTypeEnum, Value
+from .options import load_option, load_travel_times
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,24 +30,89 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Gira HomeServer cover platform."""
-    client = hass.data[DOMAIN][config_entry.entry_id]
+    travel_times = load_option(config_entry.options, CONF_COVER_TRAVEL_TIMES, load_travel_times)
 
-    entities = []
-    for device_id, device in client.get_devices(DeviceTypeEnum.COVER).items():
-        entities.append(GiraCover(client, device_id))
+    def create_cover(client: GiraClient, device_id: str) -> GiraCover:
+        travel_time = travel_times.get(device_id)
+        return GiraCover(client, device_id, CoverTravel(*travel_time) if travel_time else None)
 
-    async_add_entities(entities)
+    async_setup_gira_entities(
+        hass, config_entry, async_add_entities, {DeviceTypeEnum.COVER: create_cover}
+    )
 
-class GiraCover(CoverEntity):
+# Seconds between the estimated states published while a cover moves
+TRAVEL_UPDATE_INTERVAL = 1.0
+
+class CoverTravel:
+    """Estimate the position of a cover from the time it has been moving.
+
+    Positions are in Home Assistant terms, 0 is closed and 100 is open.
+    """
+
+    def __init__(self, up_time: float, down_time: float):
+        """Initialize the model with the full travel time in each direction."""
+        self._up_time = up_time
+        self._down_time = down_time
+        self._position: Optional[float] = None
+        self._target: Optional[float] = None
+        self._started = 0.0
+
+    @property
+    def known(self) -> bool:
+        """Return True once the model has a position to start from."""
+        return self._position is not None
+
+    def position(self, now: float) -> Optional[float]:
+        """Return the estimated position."""
+        if self._position is None or self._target is None:
+            return self._position
+        if self._target > self._position:
+            moved = (now - self._started) / self._up_time * 100
+            return min(self._target, self._position + moved)
+        moved = (now - self._started) / self._down_time * 100
+        return max(self._target, self._position - moved)
+
+    def direction(self, now: float) -> int:
+        """Return 1 while opening, -1 while closing and 0 when stopped."""
+        position = self.position(now)
+        if self._target is None or position is None or position == self._target:
+            return 0
+        return 1 if self._target > position else -1
+
+    def start(self, target: float, now: float) -> None:
+        """Start moving towards the target."""
+        self._position = self.position(now)
+        if self._position is None:
+            # Without a known start, assume a full travel
+            self._position = 0.0 if target > 50 else 100.0
+        self._target = target
+        self._started = now
+
+    def stop(self, now: float) -> None:
+        """Stop at the estimated position."""
+        self._position = self.position(now)
+        self._target = None
+
+    def correct(self, position: float, now: float) -> None:
+        """Continue from a position reported by the actuator."""
+        moving = self.direction(now) != 0
+        self._position = position
+        self._started = now
+        if not moving or position == self._target:
+            self._target = None
+
+class GiraCover(GiraEntity, CoverEntity):
     """Representation of a Gira HomeServer cover."""
 
-    def __init__(self, client: GiraClient, device_id: str):
+    def __init__(self, client: GiraClient, device_id: str, travel: Optional[CoverTravel] = None):
         """Initialize the cover."""
         self._client = client
         self._device_id = device_id
-        self._short_id = client.get_slot_id(device_id, SlotTypeEnum.COVER_SHORT)
-        self._long_id = client.get_slot_id(device_id, SlotTypeEnum.COVER_LONG)
-        self._position_id = client.get_slot_id(device_id, SlotTypeEnum.COVER_POSITION)
+        self._travel = travel
+        self._reported: Optional[Value] = None
+        # Our own position command, its optimistic value is not a report
+        self._commanded: Optional[Value] = None
+        self._unsub_update: Optional[Callable[[], None]] = None
         self._attr_name = client.get_device_name(device_id)
         self._attr_unique_id = f"{DOMAIN}_cover_{device_id}"
         self._attr_device_class = CoverDeviceClass.BLIND
@@ -57,43 +126,129 @@ class GiraCover(CoverEntity):
     @property
     def current_cover_position(self) -> Optional[int]:
         """Return current position of cover."""
+        if self._travel is not None and self._travel.known:
+            return round(self._travel.position(time.monotonic()))
         value = self._client.get_slot_val(self._device_id, SlotTypeEnum.COVER_POSITION)
         if value is None:
             return None
-        return 100 - int(float(value))
+        return 100 - int(value)
 
     @property
     def is_closed(self) -> Optional[bool]:
         """Return if the cover is closed."""
-        position = self._client.get_slot_val(self._device_id, SlotTypeEnum.COVER_POSITION)
+        position = self.current_cover_position
         if position is None:
             return None
-        return int(float(position)) == 100
+        return position == 0
+
+    @property
+    def is_opening(self) -> Optional[bool]:
+        """Return if the cover is opening, as estimated from its travel time."""
+        if self._travel is None:
+            return None
+        return self._travel.direction(time.monotonic()) > 0
+
+    @property
+    def is_closing(self) -> Optional[bool]:
+        """Return if the cover is closing, as estimated from its travel time."""
+        if self._travel is None:
+            return None
+        return self._travel.direction(time.monotonic()) < 0
+
+    async def async_added_to_hass(self) -> None:
+        """Start the travel model from the last reported position."""
+        await super().async_added_to_hass()
+        if self._travel is not None:
+            self._seed_travel()
+
+    def _seed_travel(self) -> None:
+        """Start the travel model from the position slot, if the cover has one."""
+        value = self._client.get_slot_val(self._device_id, SlotTypeEnum.COVER_POSITION)
+        self._reported = value
+        if value is not None:
+            self._travel.correct(100 - float(value), time.monotonic())
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop publishing estimated states."""
+        self._cancel_travel_update()
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def _handle_device_update(self) -> None:
+        """Correct the travel model when the actuator reports its position."""
+        if self._travel is not None:
+            value = self._client.get_slot_val(self._device_id, SlotTypeEnum.COVER_POSITION)
+            if value is not None and value != self._reported:
+                self._reported = value
+                if value != self._commanded:
+                    self._travel.correct(100 - float(value), time.monotonic())
+                self._commanded = None
+        super()._handle_device_update()
+
+    def _start_travel(self, target: float) -> None:
+        """Let the travel model follow a movement and publish its estimates."""
+        if self._travel is None:
+            return
+        if not self._travel.known:
+            self._seed_travel()
+        self._travel.start(target, time.monotonic())
+        self._schedule_travel_update()
+
+    def _cancel_travel_update(self) -> None:
+        """Cancel the next estimated state."""
+        if self._unsub_update is not None:
+            self._unsub_update()
+            self._unsub_update = None
+
+    def _schedule_travel_update(self) -> None:
+        """Publish the estimated position, throttled while the cover moves."""
+        self._cancel_travel_update()
+        if self._travel is not None and self._travel.direction(time.monotonic()):
+            self._unsub_update = async_call_later(
+                self.hass, TRAVEL_UPDATE_INTERVAL, self._handle_travel_update
+            )
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_travel_update(self, _now: Any) -> None:
+        """Write the next estimated state."""
+        self._unsub_update = None
+        self._schedule_travel_update()
 
     async def async_open_cover(self, **kwargs: Any) -> None:
         """Open the cover simluating a long press."""
-        if self._long_id is None:
+        long_id = self._slot_id(SlotTypeEnum.COVER_LONG)
+        if long_id is None:
             return
-        await self._client.update_device_value(self._device_id, self._long_id, "0")
-        self._client.set_slot_val(self._device_id, SlotTypeEnum.COVER_POSITION, "0")
+        if await self._client.update_device_value(self._device_id, long_id, "0"):
+            self._start_travel(100)
 
     async def async_close_cover(self, **kwargs: Any) -> None:
         """Close the cover simluating a long press."""
-        if self._long_id is None:
+        long_id = self._slot_id(SlotTypeEnum.COVER_LONG)
+        if long_id is None:
             return
-        await self._client.update_device_value(self._device_id, self._long_id, "1")
-        self._client.set_slot_val(self._device_id, SlotTypeEnum.COVER_POSITION, "100")
+        if await self._client.update_device_value(self._device_id, long_id, "1"):
+            self._start_travel(0)
 
     async def async_stop_cover(self, **kwargs: Any) -> None:
         """Stop the cover using the short press."""
-        if self._short_id is None:
+        short_id = self._slot_id(SlotTypeEnum.COVER_SHORT)
+        if short_id is None:
             return
-        await self._client.update_device_value(self._device_id, self._short_id, "0")
-        self._client.set_slot_val(self._device_id, SlotTypeEnum.COVER_POSITION, "50")
+        if await self._client.update_device_value(self._device_id, short_id, "0") and self._travel:
+            self._travel.stop(time.monotonic())
+            self._schedule_travel_update()
 
     async def async_set_cover_position(self, **kwargs: Any) -> None:
         """Move the cover to a specific position."""
-        if self._position_id is None:
+        position_id = self._slot_id(SlotTypeEnum.COVER_POSITION)
+        if position_id is None:
             return
         position = 100 - kwargs.get(ATTR_POSITION, 0)
-        await self._client.update_device_value(self._device_id, self._position_id, f"{position}")
+        # Set before writing, the optimistic value is applied during the call
+        self._commanded = float(position)
+        if await self._client.update_device_value(self._device_id, position_id, f"{position}"):
+            self._start_travel(100 - position)
+        else:
+            self._commanded = None
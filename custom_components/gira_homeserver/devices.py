@@ -1,7 +1,7 @@
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 import xml.etree.ElementTree as ET
 import logging
 
@@ -26,86 +26,297 @@ class SlotTypeEnum(Enum):
     CLIMATE_TARGET = "slot_targetvalue"
     CLIMATE_CURRENT = "slot_temp_actual"
 
+# Keys of the serialized device dict, kept compatible with older caches
+SLOT_ID_KEYS: Dict[SlotTypeEnum, str] = {slot: f"{slot.value}_id" for slot in SlotTypeEnum}
+
+# Numbers for numeric communication objects, the raw text otherwise
+Value = Union[float, str]
+
+def decode_value(raw: str) -> Value:
+    """Decode a raw value from the HomeServer once, on arrival."""
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+def encode_value(value: Value) -> str:
+    """Format a value for writing, integral numbers without a decimal point."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def value_changed(old: Value, new: Value, tolerance: float = 0.0) -> bool:
+    """Return True if a numeric value moved by more than the tolerance, or a text value differs."""
+    if isinstance(old, float) and isinstance(new, float):
+        return abs(new - old) > tolerance
+    return old != new
+
+# Analog slots whose cyclic telegrams jitter around the same value, changes
+# within the tolerance are not forwarded to entities. The tolerance is half
+# a display step, so every 0.1 °C step is forwarded despite float rounding
+# while smaller jitter is not.
+DEFAULT_TOLERANCES: Dict[SlotTypeEnum, float] = {
+    SlotTypeEnum.CLIMATE_CURRENT: 0.05,
+}
+
+@dataclass(frozen=True, slots=True)
+class SlotTransform:
+    """Linear conversion between the raw value of a tag and the slot value."""
+    scale: float = 1.0
+    offset: float = 0.0
+
+    def to_value(self, raw: Value) -> Value:
+        """Convert a raw value received from the HomeServer."""
+        if not isinstance(raw, float):
+            return raw
+        return raw * self.scale + self.offset
+
+    def to_raw(self, value: Value) -> Value:
+        """Convert a slot value back into the raw value to write."""
+        if not isinstance(value, float):
+            return value
+        return (value - self.offset) / self.scale
+
+@dataclass(slots=True)
+class Slot:
+    """A device slot wired to a connection tag, holding its decoded value."""
+    device_id: str
+    type: SlotTypeEnum
+    tag: str
+    value: Value = 0.0
+    transform: Optional[SlotTransform] = None
+
+@dataclass(slots=True)
+class Device:
+    """A device discovered in the HomeServer project."""
+    id: str
+    name: str
+    type: DeviceTypeEnum
+    slots: Dict[SlotTypeEnum, Slot] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """Serialize the device without its runtime values."""
+        data = {"name": self.name, "type": self.type.value}
+        for slot_type, slot in self.slots.items():
+            data[SLOT_ID_KEYS[slot_type]] = slot.tag
+        return data
+
+    @classmethod
+    def from_dict(
+        cls, device_id: str, data: dict, config: Optional[Dict["DeviceTypeEnum", "DeviceConfig"]] = None
+    ) -> "Device":
+        """Restore a device serialized with to_dict, with the transforms of the config."""
+        device = cls(device_id, data["name"], DeviceTypeEnum(data["type"]))
+        device_config = (config or DEFAULT_CONFIG).get(device.type)
+        transforms = device_config.transforms if device_config else {}
+        for slot_type, key in SLOT_ID_KEYS.items():
+            tag = data.get(key)
+            if tag is not None:
+                device.slots[slot_type] = Slot(
+                    device_id, slot_type, tag, transform=transforms.get(slot_type)
+                )
+        return device
+
+# Maps a connection tag to every device slot it is wired to
+TagIndex = Dict[str, List[Slot]]
+
+def build_tag_index(devices: Dict[str, Device]) -> TagIndex:
+    """Rebuild the tag index for an already parsed device map."""
+    tags: TagIndex = {}
+    for device in devices.values():
+        for slot in device.slots.values():
+            tags.setdefault(slot.tag, []).append(slot)
+    return tags
+
+@dataclass
+class ProjectDiff:
+    """Devices that differ between two parsed projects."""
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    new_tags: Set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        """Return True if any device was added, removed or rewired."""
+        return bool(self.added or self.removed or self.changed)
+
+def diff_devices(old: Dict[str, Device], new: Dict[str, Device]) -> ProjectDiff:
+    """Compare two device maps, a device whose type changed is removed and added again."""
+    diff = ProjectDiff()
+    for device_id, device in new.items():
+        previous = old.get(device_id)
+        if previous is None:
+            diff.added.append(device_id)
+        elif previous.type is not device.type:
+            diff.removed.append(device_id)
+            diff.added.append(device_id)
+        elif previous.name != device.name or previous.slots.keys() != device.slots.keys() or any(
+            previous.slots[slot_type].tag != slot.tag for slot_type, slot in device.slots.items()
+        ):
+            diff.changed.append(device_id)
+
+    diff.removed.extend(device_id for device_id in old if device_id not in new)
+    return diff
+
 @dataclass
 class DeviceConfig:
     name: str
     type: DeviceTypeEnum
     slots: List[SlotTypeEnum]
+    # A device matching several types gets the one with the highest priority
+    priority: int = 0
+    # Slot names in the project wired to each slot, by default the enum value
+    slot_names: Dict[SlotTypeEnum, Tuple[str, ...]] = field(default_factory=dict)
+    transforms: Dict[SlotTypeEnum, SlotTransform] = field(default_factory=dict)
 
-class Parser:
-    def __init__(self, config=None):
-        self.devices = {}
-        self.config = config or DEFAULT_CONFIG
+    def __post_init__(self) -> None:
+        """Fill in the default name of every slot without explicit names."""
+        for slot_type in self.slots:
+            self.slot_names.setdefault(slot_type, (slot_type.value,))
+
+class SlotMatcher:
+    """Device configs compiled into a lookup from slot name to the best device type.
+
+    Classifying a device then takes one dict lookup per connection instead of
+    comparing its slots against every device type.
+    """
 
-    def _matches_device_type(self, connections: dict, device_config: DeviceConfig) -> bool:
-        """Check if connections match the slots for a device type."""
-        connection_slots = set(connections.keys())
-        config_slots = {slot.value for slot in device_config.slots}
-        return bool(config_slots & connection_slots)
+    def __init__(self, config: Dict[DeviceTypeEnum, DeviceConfig]):
+        """Compile the device configs."""
+        self.config = config
+        # Earlier configs win between equal priorities, as before
+        ranked = sorted(
+            enumerate(config.values()), key=lambda item: (-item[1].priority, item[0])
+        )
+        self._best: Dict[str, Tuple[int, DeviceConfig]] = {}
+        for rank, (_, device_config) in enumerate(ranked):
+            for names in device_config.slot_names.values():
+                for name in names:
+                    self._best.setdefault(name, (rank, device_config))
+
+    def classify(self, connections: Dict[str, str]) -> Optional[DeviceConfig]:
+        """Return the config of the best device type wired to any of the connections."""
+        best: Optional[Tuple[int, DeviceConfig]] = None
+        lookup = self._best
+        for name in connections:
+            candidate = lookup.get(name)
+            if candidate is not None and (best is None or candidate[0] < best[0]):
+                best = candidate
+        return best[1] if best else None
+
+class Parser:
+    def __init__(self, config=None, *, matcher: Optional[SlotMatcher] = None):
+        self.devices: Dict[str, Device] = {}
+        self.tags: TagIndex = {}
+        if matcher is None:
+            matcher = SlotMatcher(config) if config else DEFAULT_MATCHER
+        self.matcher = matcher
+        self.config = matcher.config
+        # Incremental parsing state
+        self._pull: Optional[ET.XMLPullParser] = None
+        self._stack: List[ET.Element] = []
+        self._devices: Optional[ET.Element] = None
+        self._seen_names: Set[str] = set()
 
     def _add_device(self, device_id: str, device_name: str, device_config: DeviceConfig, connections: dict) -> None:
-        """Create and add a device dictionary with available slots."""
-        device_dict = {
-            "name": device_name,
-            "type": device_config.type.value,
-        }
+        """Create and add a device with its available slots."""
+        device = Device(device_id, device_name, device_config.type)
 
-        # Add all matching slots
-        for slot in device_config.slots:
-            if slot.value in connections:
-                device_dict[f"{slot.value}_id"] = connections[slot.value]
-                device_dict[f"{slot.value}_val"] = "0.0"
+        # Add the first wired name of every slot
+        for slot_type, names in device_config.slot_names.items():
+            for name in names:
+                if name in connections:
+                    slot = Slot(
+                        device_id,
+                        slot_type,
+                        connections[name],
+                        transform=device_config.transforms.get(slot_type),
+                    )
+                    device.slots[slot_type] = slot
+                    self.tags.setdefault(slot.tag, []).append(slot)
+                    break
 
-        self.devices[device_id] = device_dict
+        self.devices[device_id] = device
 
-    def parse(self, xml: str) -> dict:
+    def parse(self, xml) -> Dict[str, Device]:
         """Parse device XML and return devices dict."""
-        root = ET.fromstring(xml).find("devices")
-        if root is None:
-            return self.devices
+        self.feed(xml)
+        return self.close()
 
-        # Keep track of device names we've seen
-        seen_names = set()
+    def feed(self, chunk) -> None:
+        """Parse the next chunk of the project XML."""
+        if self._pull is None:
+            self._pull = ET.XMLPullParser(events=("start", "end"))
+        self._pull.feed(chunk)
+        self._process_events()
 
-        for device in root.findall("device"):
-            device_id = device.attrib.get("id", "0")
-            device_name = device.attrib.get("txt", "Unknown Device")
+    def close(self) -> Dict[str, Device]:
+        """Finish parsing and return devices dict."""
+        if self._pull is not None:
+            self._pull.close()
+            self._process_events()
+            self._pull = None
 
-            # Skip devices we've already seen
-            if device_name in seen_names:
-                continue
-            seen_names.add(device_name)
+        _LOGGER.debug("Found %s devices", len(self.devices))
+        return self.devices
 
-            # Skip devices without any connections
-            if len(device.findall("connect")) == 0:
+    def _process_events(self) -> None:
+        """Handle every <device> as soon as it is complete, then drop it from the tree."""
+        stack = self._stack
+        for event, elem in self._pull.read_events():
+            if event == "start":
+                stack.append(elem)
+                # Only the first <devices> directly below the root is parsed
+                if len(stack) == 2 and elem.tag == "devices" and self._devices is None:
+                    self._devices = elem
                 continue
 
-            # Parse connections
-            connections = {
-                conn.attrib["slot"]: conn.attrib["tag"]
-                for conn in device.findall("connect")
-                if "slot" in conn.attrib and "tag" in conn.attrib
-            }
-
-            for device_config in self.config.values():
-                if self._matches_device_type(connections, device_config):
-                    self._add_device(device_id, device_name, device_config, connections)
-                    _LOGGER.debug(
-                        "Found %s %s, connections: %s",
-                        device_config.type.value,
-                        device_id,
-                        connections
-                    )
-                    break
-            else:
-                _LOGGER.debug(
-                    "Unknown device type for device %s with connections: %s",
-                    device_id,
-                    connections
-                )
+            stack.pop()
+            if len(stack) == 2:
+                if stack[1] is self._devices and elem.tag == "device":
+                    self._handle_device(elem)
+                # Earlier siblings were already removed, so this is cheap
+                del stack[1][:]
+            elif len(stack) == 1:
+                del stack[0][:]
 
-        _LOGGER.debug("Found %s devices", len(self.devices))
-        return self.devices
+    def _handle_device(self, device: ET.Element) -> None:
+        """Classify a single <device> element and add it if it matches a type."""
+        device_id = device.attrib.get("id", "0")
+        device_name = device.attrib.get("txt", "Unknown Device")
+
+        # Skip devices we've already seen
+        if device_name in self._seen_names:
+            return
+        self._seen_names.add(device_name)
+
+        # Skip devices without any connections
+        connects = device.findall("connect")
+        if len(connects) == 0:
+            return
+
+        # Parse connections
+        connections = {
+            conn.attrib["slot"]: conn.attrib["tag"]
+            for conn in connects
+            if "slot" in conn.attrib and "tag" in conn.attrib
+        }
+
+        device_config = self.matcher.classify(connections)
+        if device_config is not None:
+            self._add_device(device_id, device_name, device_config, connections)
+            _LOGGER.debug(
+                "Found %s %s, connections: %s",
+                device_config.type.value,
+                device_id,
+                connections
+            )
+        else:
+            _LOGGER.debug(
+                "Unknown device type for device %s with connections: %s",
+                device_id,
+                connections
+            )
 
 # Default device configurations
 DEFAULT_CONFIG: Dict[DeviceTypeEnum, DeviceConfig] = {
@@ -135,3 +346,92 @@ DEFAULT_CONFIG: Dict[DeviceTypeEnum, DeviceConfig] = {
         slots=[SlotTypeEnum.CLIMATE_TARGET, SlotTypeEnum.CLIMATE_CURRENT],
     ),
 }
+
+DEFAULT_MATCHER = SlotMatcher(DEFAULT_CONFIG)
+
+def load_slot_mapping(mapping: Optional[Dict[str, Any]]) -> Dict[DeviceTypeEnum, DeviceConfig]:
+    """Apply an installation specific slot mapping on top of the default config.
+
+    The mapping is keyed by device type, every entry may set a priority and,
+    under slots, the project slot names and a linear transform per slot:
+
+        cover:
+          priority: 10
+          slots:
+            slot_position:
+              names: [position, slot_position]
+              scale: -1
+              offset: 100
+            slot_long: long_press
+
+    Slots are identified by their default name. Raises ValueError for an
+    invalid mapping.
+    """
+    config = {
+        device_type: DeviceConfig(
+            default.name,
+            default.type,
+            list(default.slots),
+            default.priority,
+            dict(default.slot_names),
+            dict(default.transforms),
+        )
+        for device_type, default in DEFAULT_CONFIG.items()
+    }
+    if not mapping:
+        return config
+    if not isinstance(mapping, dict):
+        raise ValueError("Slot mapping must be a mapping of device types")
+
+    for type_name, entry in mapping.items():
+        try:
+            device_config = config[DeviceTypeEnum(type_name)]
+        except ValueError:
+            raise ValueError(f"Unknown device type: {type_name}") from None
+        if not isinstance(entry, dict):
+            raise ValueError(f"Mapping of {type_name} must be a mapping")
+
+        try:
+            device_config.priority = int(entry.get("priority", device_config.priority))
+        except (TypeError, ValueError):
+            raise ValueError(f"Priority of {type_name} must be a number") from None
+
+        slots = entry.get("slots") or {}
+        if not isinstance(slots, dict):
+            raise ValueError(f"Slots of {type_name} must be a mapping")
+        for slot_name, slot_entry in slots.items():
+            try:
+                slot_type = SlotTypeEnum(slot_name)
+            except ValueError:
+                slot_type = None
+            if slot_type not in device_config.slots:
+                raise ValueError(f"{type_name} has no slot {slot_name}")
+
+            if not isinstance(slot_entry, dict):
+                slot_entry = {"names": slot_entry}
+            names = slot_entry.get("names", slot_name)
+            if isinstance(names, str):
+                names = [names]
+            if not names or not all(isinstance(name, str) and name for name in names):
+                raise ValueError(f"Names of {type_name} slot {slot_name} must be strings")
+            device_config.slot_names[slot_type] = tuple(names)
+
+            if "scale" in slot_entry or "offset" in slot_entry:
+                try:
+                    transform = SlotTransform(
+                        float(slot_entry.get("scale", 1.0)),
+                        float(slot_entry.get("offset", 0.0)),
+                    )
+                except (TypeError, ValueError):
+                    raise ValueError(
+                        f"Transform of {type_name} slot {slot_name} must be numeric"
+                    ) from None
+                if transform.scale == 0:
+                    raise ValueError(f"Scale of {type_name} slot {slot_name} must not be 0")
+                device_config.transforms[slot_type] = transform
+
+    for device_config in config.values():
+        names = [name for names in device_config.slot_names.values() for name in names]
+        if len(names) != len(set(names)):
+            raise ValueError(f"Slot names of {device_config.type.value} must be unique")
+    return config
@@ -0,0 +1,44 @@
+"""Diagnostics support for the Gira HomeServer integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .client import GiraClient
+from .const import DOMAIN
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    client: GiraClient = hass.data[DOMAIN][entry.entry_id]
+    devices_by_type: dict[str, int] = {}
+    for device in client.devices.values():
+        devices_by_type[device.type.value] = devices_by_type.get(device.type.value, 0) + 1
+
+    command_connection = None
+    if client.command_connection is not None:
+        command_connection = {
+            "connected": client.command_connection.connected,
+            "failures": client.command_connection.failures,
+        }
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "client": {
+            "state": client.state.name,
+            "available": client.available,
+            "devices": devices_by_type,
+            "slots": sum(len(device.slots) for device in client.devices.values()),
+            "project_hash": client.project_hash,
+            "command_connection": command_connection,
+        },
+        "metrics": client.metrics.as_dict(),
+    }
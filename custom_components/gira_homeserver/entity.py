@@ -0,0 +1,192 @@
+"""Base entity for the Gira HomeServer integration."""
+from __future__ import annotations
+
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .client import GiraClient
+from .const import CONF_DISCOVER_TAGS, CONF_TAGS, DOMAIN, SIGNAL_DEVICES_ADDED
+from .devices import DeviceTypeEnum, SlotTypeEnum, Value
+from .options import TAG_PLATFORMS, TagEntityConfig, load_option, load_tag_config
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_setup_gira_entities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    factories: Dict[DeviceTypeEnum, Callable[[GiraClient, str], GiraEntity]],
+) -> None:
+    """Add entities for the known devices and for devices found by a later rediscovery."""
+    client: GiraClient = hass.data[DOMAIN][config_entry.entry_id]
+
+    @callback
+    def async_add_devices(device_ids: Iterable[str]) -> None:
+        entities = []
+        for device_id in device_ids:
+            device = client.get_device(device_id)
+            if device is not None and device.type in factories:
+                entities.append(factories[device.type](client, device_id))
+        if entities:
+            async_add_entities(entities)
+
+    async_add_devices(list(client.devices))
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_DEVICES_ADDED.format(entry_id=config_entry.entry_id),
+            async_add_devices,
+        )
+    )
+
+
+@callback
+def async_setup_tag_entities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    platform: str,
+    factory: Callable[[GiraClient, str, Value, TagEntityConfig, bool], GiraTagEntity],
+) -> None:
+    """Add entities for configured tags outside the known devices as they appear."""
+    client: GiraClient = hass.data[DOMAIN][config_entry.entry_id]
+    filters = load_option(config_entry.options, CONF_TAGS, load_tag_config)
+
+    own = filters[platform]
+    others = [filters[other] for other in TAG_PLATFORMS if other != platform]
+    # Every remaining tag becomes a disabled sensor if discovery is enabled
+    discover = platform == "sensor" and config_entry.options.get(CONF_DISCOVER_TAGS, False)
+    if not own and not discover:
+        return
+
+    pending: List[GiraTagEntity] = []
+
+    @callback
+    def async_flush() -> None:
+        entities = list(pending)
+        pending.clear()
+        async_add_entities(entities)
+
+    @callback
+    def async_new_tag(tag: str, value: Value) -> None:
+        config = own.match(tag)
+        if config is not None:
+            entity = factory(client, tag, value, config, True)
+        elif discover and not any(other.match(tag) for other in others):
+            entity = factory(client, tag, value, TagEntityConfig(tag), False)
+        else:
+            return
+        # A value dump offers thousands of tags at once, add them in one go
+        if not pending:
+            hass.loop.call_soon(async_flush)
+        pending.append(entity)
+
+    config_entry.async_on_unload(client.subscribe_new_tags(async_new_tag))
+
+
+class GiraEntity(Entity):
+    """Base class for entities backed by a Gira HomeServer device."""
+
+    _attr_should_poll = False
+
+    _client: GiraClient
+    _device_id: str
+    _device_type: Optional[DeviceTypeEnum] = None
+    _device_removed = False
+
+    @property
+    def available(self) -> bool:
+        """Return True while the client is connected to the HomeServer."""
+        return self._client.available
+
+    def _slot_id(self, slot: SlotTypeEnum) -> Optional[str]:
+        """Return the tag currently wired to a slot of this device."""
+        return self._client.get_slot_id(self._device_id, slot)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to pushed updates of the device slots and the connection."""
+        await super().async_added_to_hass()
+        device = self._client.get_device(self._device_id)
+        if device is not None:
+            self._device_type = device.type
+        self.async_on_remove(
+            self._client.subscribe_device(self._device_id, self._handle_device_update)
+        )
+        self.async_on_remove(
+            self._client.subscribe_connection(self.async_write_ha_state)
+        )
+
+    @callback
+    def _handle_device_update(self) -> None:
+        """Write the new state, or remove the entity if its device is gone."""
+        device = self._client.get_device(self._device_id)
+        if device is None or device.type is not self._device_type:
+            self._async_remove_device()
+            return
+        self._attr_name = device.name
+        self.async_write_ha_state()
+
+    @callback
+    def _async_remove_device(self) -> None:
+        """Remove an entity whose device no longer exists in the project."""
+        if self._device_removed:
+            return
+        self._device_removed = True
+        if self.registry_entry is not None:
+            # Removing the registry entry also removes the entity
+            er.async_get(self.hass).async_remove(self.entity_id)
+        else:
+            self.hass.async_create_task(self.async_remove(force_remove=True))
+
+
+class GiraTagEntity(Entity):
+    """Base class for entities backed by a single tag outside the known devices.
+
+    The tag is only subscribed while the entity is added, so a disabled
+    entity costs nothing per telegram.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        client: GiraClient,
+        tag: str,
+        value: Value,
+        config: TagEntityConfig,
+        enabled: bool,
+    ):
+        """Initialize the entity with the value the tag was discovered with."""
+        self._client = client
+        self._tag = tag
+        self._value = value
+        self._attr_name = config.name or f"Gira {tag}"
+        self._attr_entity_registry_enabled_default = enabled
+
+    @property
+    def available(self) -> bool:
+        """Return True while the client is connected to the HomeServer."""
+        return self._client.available
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to pushed updates of the tag and the connection."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._client.subscribe_tag(self._tag, self._handle_value))
+        self.async_on_remove(
+            self._client.subscribe_connection(self.async_write_ha_state)
+        )
+
+    @callback
+    def _handle_value(self, tag: str, value: Value) -> None:
+        """Store the new value and write the state."""
+        self._value = value
+        self.async_write_ha_state()
@@ -12,10 +12,13 @@ from homeassistant.components.light import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import slugify
 
-from .const import DOMAIN
+from .const import CONF_LIGHT_GROUPS, DOMAIN
 from .client import GiraClient
-from .devices import DeviceTypeEnum, SlotTypeEnum
+from .entity import GiraEntity, async_setup_gira_entities
+from .devices import DeviceTypeEnum, SlotTypeEnum, Value
+from .options import load_groups, load_option
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,25 +28,38 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Gira HomeServer light platform."""
-    client = hass.data[DOMAIN][config_entry.entry_id]
-
-    entities = []
-    for device_id in client.get_devices(DeviceTypeEnum.LIGHT).keys():
-        entities.append(GiraLight(client, device_id))
-    for device_id in client.get_devices(DeviceTypeEnum.DIMMER).keys():
-        entities.append(GiraDimmer(client, device_id))
-
-    async_add_entities(entities)
-
-class GiraLight(LightEntity):
+    async_setup_gira_entities(
+        hass,
+        config_entry,
+        async_add_entities,
+        {DeviceTypeEnum.LIGHT: GiraLight, DeviceTypeEnum.DIMMER: GiraDimmer},
+    )
+
+    groups = load_option(config_entry.options, CONF_LIGHT_GROUPS, load_groups)
+    client: GiraClient = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities(
+        GiraLightGroup(client, config_entry.entry_id, name, members)
+        for name, members in groups.items()
+    )
+
+def dimmer_is_on(switch: Optional[Value], brightness: Optional[Value]) -> bool:
+    """Return True if a dimmer is on, a switch reported off wins over the brightness.
+
+    Switching off only writes the switch tag, the actuator keeps its last
+    brightness for the next time it is switched on.
+    """
+    if switch == 0:
+        return False
+    return switch == 1 or (isinstance(brightness, float) and brightness > 0)
+
+class GiraLight(GiraEntity, LightEntity):
     """Representation of a Gira HomeServer light."""
 
     def __init__(self, client: GiraClient, device_id: str):
         """Initialize the light."""
         self._client = client
         self._device_id = device_id
-        self._switch_id = client.get_slot_id(device_id, SlotTypeEnum.LIGHT_SWITCH)
-        self._attr_name = client.devices[device_id]["name"]
+        self._attr_name = client.get_device_name(device_id)
         self._attr_unique_id = f"{DOMAIN}_light_{device_id}"
         self._attr_color_mode = ColorMode.ONOFF
         self._attr_supported_color_modes = {ColorMode.ONOFF}
@@ -54,19 +70,21 @@ class GiraLight(LightEntity):
         value = self._client.get_slot_val(self._device_id, SlotTypeEnum.LIGHT_SWITCH)
         if value is None:
             return None
-        return int(float(value)) == 1
+        return int(value) == 1
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the light on."""
-        if self._switch_id is None:
+        switch_id = self._slot_id(SlotTypeEnum.LIGHT_SWITCH)
+        if switch_id is None:
             return
-        await self._client.update_device_value(self._device_id, self._switch_id, "1")
+        await self._client.update_device_value(self._device_id, switch_id, "1")
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the light off."""
-        if self._switch_id is None:
+        switch_id = self._slot_id(SlotTypeEnum.LIGHT_SWITCH)
+        if switch_id is None:
             return
-        await self._client.update_device_value(self._device_id, self._switch_id, "0")
+        await self._client.update_device_value(self._device_id, switch_id, "0")
 
 class GiraDimmer(GiraLight):
     """Representation of a Gira HomeServer dimmer."""
@@ -75,8 +93,6 @@ class GiraDimmer(GiraLight):
         """Initialize the dimmer."""
         self._client = client
         self._device_id = device_id
-        self._switch_id = client.get_slot_id(device_id, SlotTypeEnum.DIMMER_SWITCH)
-        self._brightness_id = client.get_slot_id(device_id, SlotTypeEnum.DIMMER_BRIGHTNESS)
         self._attr_name = client.get_device_name(device_id)
         self._attr_unique_id = f"{DOMAIN}_dimmer_{device_id}"
         self._attr_color_mode = ColorMode.BRIGHTNESS
@@ -89,7 +105,7 @@ class GiraDimmer(GiraLight):
         switch = self._client.get_slot_val(self._device_id, SlotTypeEnum.DIMMER_SWITCH)
         if value is None or switch is None:
             return None
-        return int(float(value)) > 0 or switch == "1"
+        return dimmer_is_on(switch, value)
 
     @property
     def brightness(self) -> Optional[int]:
@@ -97,23 +113,106 @@ class GiraDimmer(GiraLight):
         value = self._client.get_slot_val(self._device_id, SlotTypeEnum.DIMMER_BRIGHTNESS)
         if value is None:
             return None
-        return int(float(value) * 2.55)
+        return int(value * 2.55)
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the light on."""
-        if self._brightness_id is None or self._switch_id is None:
+        switch_id = self._slot_id(SlotTypeEnum.DIMMER_SWITCH)
+        brightness_id = self._slot_id(SlotTypeEnum.DIMMER_BRIGHTNESS)
+        if brightness_id is None or switch_id is None:
             return
 
         if kwargs.get(ATTR_BRIGHTNESS) is None:
-            await self._client.update_device_value(self._device_id, self._switch_id, "1")
+            await self._client.update_device_value(self._device_id, switch_id, "1")
             return
 
         brightness = round(kwargs[ATTR_BRIGHTNESS] / 2.55, 1)
-        await self._client.update_device_value(self._device_id, self._brightness_id, f"{brightness}")
+        await self._client.update_device_value(self._device_id, brightness_id, f"{brightness}")
+        # A switch that reads off would keep the dimmer shown as off
+        if self._client.get_slot_val(self._device_id, SlotTypeEnum.DIMMER_SWITCH) == 0:
+            await self._client.update_device_value(self._device_id, switch_id, "1")
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the light off."""
-        if self._switch_id is None:
+        switch_id = self._slot_id(SlotTypeEnum.DIMMER_SWITCH)
+        if switch_id is None:
             return
-        await self._client.update_device_value(self._device_id, self._switch_id, "0")
-        self._client.set_slot_val(self._device_id, SlotTypeEnum.DIMMER_BRIGHTNESS, "0")
+        await self._client.update_device_value(self._device_id, switch_id, "0")
+
+class GiraLightGroup(LightEntity):
+    """Lights and dimmers switched together with a single batched write."""
+
+    _attr_should_poll = False
+
+    def __init__(self, client: GiraClient, entry_id: str, name: str, members: list[str]):
+        """Initialize the light group."""
+        self._client = client
+        self._members = members
+        self._attr_name = name
+        self._attr_unique_id = f"{DOMAIN}_light_group_{entry_id}_{slugify(name)}"
+        self._attr_color_mode = ColorMode.ONOFF
+        self._attr_supported_color_modes = {ColorMode.ONOFF}
+
+    @property
+    def available(self) -> bool:
+        """Return True while the client is connected to the HomeServer."""
+        return self._client.available
+
+    @property
+    def is_on(self) -> Optional[bool]:
+        """Return true if any member is on."""
+        for device_id in self._members:
+            device = self._client.get_device(device_id)
+            if device is None:
+                continue
+            if device.type is DeviceTypeEnum.LIGHT:
+                on = self._client.get_slot_val(device_id, SlotTypeEnum.LIGHT_SWITCH) == 1
+            elif device.type is DeviceTypeEnum.DIMMER:
+                on = dimmer_is_on(
+                    self._client.get_slot_val(device_id, SlotTypeEnum.DIMMER_SWITCH),
+                    self._client.get_slot_val(device_id, SlotTypeEnum.DIMMER_BRIGHTNESS),
+                )
+            else:
+                continue
+            if on:
+                return True
+        return False
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to pushed updates of every member and the connection."""
+        await super().async_added_to_hass()
+        for device_id in self._members:
+            self.async_on_remove(
+                self._client.subscribe_device(device_id, self.async_write_ha_state)
+            )
+        self.async_on_remove(
+            self._client.subscribe_connection(self.async_write_ha_state)
+        )
+
+    def _member_values(self, on: bool) -> list[tuple[str, str]]:
+        """Return the tag values switching every member on or off."""
+        value = "1" if on else "0"
+        values = []
+        for device_id in self._members:
+            device = self._client.get_device(device_id)
+            if device is None:
+                _LOGGER.debug("Light group %s: device %s not found", self.name, device_id)
+                continue
+            if device.type is DeviceTypeEnum.LIGHT:
+                slots = [SlotTypeEnum.LIGHT_SWITCH]
+            elif device.type is DeviceTypeEnum.DIMMER:
+                slots = [SlotTypeEnum.DIMMER_SWITCH]
+            else:
+                continue
+            values.extend(
+                (device.slots[slot].tag, value) for slot in slots if slot in device.slots
+            )
+        return values
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Turn every member on."""
+        await self._client.update_values(self._member_values(True))
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Turn every member off."""
+        await self._client.update_values(self._member_values(False))
@@ -0,0 +1,109 @@
+"""Runtime counters and timings of the Gira HomeServer client."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds in milliseconds of the dispatch latency buckets
+LATENCY_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100)
+
+
+@dataclass(slots=True)
+class Histogram:
+    """Count observations in fixed buckets, the last bucket takes everything above."""
+    bounds: Tuple[float, ...]
+    counts: List[int] = field(default_factory=list)
+    total: float = 0.0
+    maximum: float = 0.0
+
+    def __post_init__(self) -> None:
+        """Create one counter per bucket plus the overflow bucket."""
+        if not self.counts:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    @property
+    def count(self) -> int:
+        """Return the number of observations."""
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        """Add an observation."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def as_dict(self) -> dict:
+        """Return the buckets keyed by their upper bound."""
+        count = self.count
+        buckets = {f"le_{bound:g}": n for bound, n in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": count,
+            "mean": self.total / count if count else None,
+            "max": self.maximum,
+            "buckets": buckets,
+        }
+
+
+@dataclass(slots=True)
+class ClientMetrics:
+    """Counters and last timings of a GiraClient, durations are in seconds."""
+    frames_received: int = 0
+    frames_sent: int = 0
+    bytes_received: int = 0
+    bytes_sent: int = 0
+    frames_by_action: Counter = field(default_factory=Counter)
+    frames_malformed: int = 0
+    frames_dropped: int = 0
+    messages_dropped: int = 0
+    updates_forwarded: int = 0
+    updates_suppressed: int = 0
+    events_fired: int = 0
+    events_rate_limited: int = 0
+    commands_confirmed: int = 0
+    commands_retried: int = 0
+    commands_rolled_back: int = 0
+    reconnects: int = 0
+    command_reconnects: int = 0
+    command_fallbacks: int = 0
+    login_time: Optional[float] = None
+    project_download_time: Optional[float] = None
+    project_parse_time: Optional[float] = None
+    fetch_time: Optional[float] = None
+    dispatch_latency_ms: Histogram = field(
+        default_factory=lambda: Histogram(LATENCY_BUCKETS)
+    )
+
+    def as_dict(self) -> Dict[str, object]:
+        """Return the metrics as plain data for diagnostics."""
+        return {
+            "frames_received": self.frames_received,
+            "frames_sent": self.frames_sent,
+            "bytes_received": self.bytes_received,
+            "bytes_sent": self.bytes_sent,
+            "frames_by_action": {
+                str(action): count
+                for action, count in sorted(self.frames_by_action.items())
+            },
+            "frames_malformed": self.frames_malformed,
+            "frames_dropped": self.frames_dropped,
+            "messages_dropped": self.messages_dropped,
+            "updates_forwarded": self.updates_forwarded,
+            "updates_suppressed": self.updates_suppressed,
+            "events_fired": self.events_fired,
+            "events_rate_limited": self.events_rate_limited,
+            "commands_confirmed": self.commands_confirmed,
+            "commands_retried": self.commands_retried,
+            "commands_rolled_back": self.commands_rolled_back,
+            "reconnects": self.reconnects,
+            "command_reconnects": self.command_reconnects,
+            "command_fallbacks": self.command_fallbacks,
+            "login_time": self.login_time,
+            "project_download_time": self.project_download_time,
+            "project_parse_time": self.project_parse_time,
+            "fetch_time": self.fetch_time,
+            "dispatch_latency_ms": self.dispatch_latency_ms.as_dict(),
+        }
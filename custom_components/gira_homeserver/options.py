@@ -0,0 +1,260 @@
+"""Loaders for the YAML options of the Gira HomeServer integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, TypeVar
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util.yaml import parse_yaml
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def parse_option(text: Optional[str], loader: Callable[[Any], T]) -> T:
+    """Parse a YAML option and validate it with its loader.
+
+    An empty option is handed to the loader as None. Raises
+    HomeAssistantError for invalid YAML and ValueError for invalid content.
+    """
+    return loader(parse_yaml(text) if text and text.strip() else None)
+
+def load_option(options: Mapping[str, Any], key: str, loader: Callable[[Any], T]) -> T:
+    """Load a YAML option of a config entry, an invalid option loads as empty."""
+    try:
+        return parse_option(options.get(key), loader)
+    except (HomeAssistantError, ValueError) as err:
+        _LOGGER.error("Invalid %s option, ignoring it: %s", key, err)
+        return loader(None)
+
+def load_groups(mapping: Optional[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Validate a mapping of group names to the ids of their member devices.
+
+    Raises ValueError for an invalid mapping.
+    """
+    if not mapping:
+        return {}
+    if not isinstance(mapping, dict):
+        raise ValueError("Groups must be a mapping of group names")
+
+    groups: Dict[str, List[str]] = {}
+    for name, members in mapping.items():
+        if not isinstance(members, list) or not members:
+            raise ValueError(f"Group {name} must list its member device ids")
+        if not all(isinstance(member, (str, int)) for member in members):
+            raise ValueError(f"Members of group {name} must be device ids")
+        groups[str(name)] = [str(member) for member in members]
+    return groups
+
+@dataclass(frozen=True)
+class TagEntityConfig:
+    """Settings of an entity created for a tag outside the known devices."""
+    tag: str
+    name: Optional[str] = None
+    unit: Optional[str] = None
+    device_class: Optional[str] = None
+
+class TagFilter:
+    """Exact tags and glob patterns, exact tags are checked first."""
+
+    def __init__(self, entries: List[TagEntityConfig]):
+        """Split the entries into the exact lookup and the patterns."""
+        self.exact: Dict[str, TagEntityConfig] = {}
+        self.patterns: List[TagEntityConfig] = []
+        for entry in entries:
+            if any(char in entry.tag for char in "*?["):
+                self.patterns.append(entry)
+            else:
+                self.exact.setdefault(entry.tag, entry)
+
+    def __bool__(self) -> bool:
+        """Return True if the filter can match any tag."""
+        return bool(self.exact or self.patterns)
+
+    def match(self, tag: str) -> Optional[TagEntityConfig]:
+        """Return the config of the first entry matching the tag."""
+        entry = self.exact.get(tag)
+        if entry is not None:
+            return entry
+        for pattern in self.patterns:
+            if fnmatchcase(tag, pattern.tag):
+                return pattern
+        return None
+
+TAG_PLATFORMS = ("sensor", "binary_sensor")
+
+def load_tag_config(mapping: Optional[Dict[str, Any]]) -> Dict[str, TagFilter]:
+    """Validate the tags exposed as sensors and binary sensors.
+
+    Every platform lists tags or glob patterns, either as plain strings or
+    with a name, unit and device class:
+
+        sensor:
+          - "12*"
+          - tag: "12345"
+            name: Energy meter
+            unit: kWh
+            device_class: energy
+        binary_sensor:
+          - tag: "20001"
+            name: Kitchen window
+            device_class: window
+
+    Raises ValueError for an invalid mapping.
+    """
+    filters = {platform: TagFilter([]) for platform in TAG_PLATFORMS}
+    if not mapping:
+        return filters
+    if not isinstance(mapping, dict):
+        raise ValueError("Tags must be a mapping of platforms")
+
+    for platform, entries in mapping.items():
+        if platform not in TAG_PLATFORMS:
+            raise ValueError(f"Unknown platform: {platform}")
+        if not isinstance(entries, list):
+            raise ValueError(f"Tags of {platform} must be a list")
+
+        configs = []
+        for entry in entries:
+            if isinstance(entry, (str, int)):
+                entry = {"tag": entry}
+            if not isinstance(entry, dict) or not isinstance(entry.get("tag"), (str, int)):
+                raise ValueError(f"Every {platform} entry needs a tag")
+            unknown = set(entry) - {"tag", "name", "unit", "device_class"}
+            if unknown:
+                raise ValueError(f"Unknown {platform} options: {', '.join(sorted(unknown))}")
+            configs.append(
+                TagEntityConfig(
+                    str(entry["tag"]),
+                    entry.get("name"),
+                    entry.get("unit"),
+                    entry.get("device_class"),
+                )
+            )
+        filters[platform] = TagFilter(configs)
+    return filters
+
+def load_travel_times(mapping: Optional[Dict[str, Any]]) -> Dict[str, Tuple[float, float]]:
+    """Validate the travel times of covers, as (opening, closing) seconds by device id.
+
+    A cover takes either one time for both directions or separate ones:
+
+        "12": 30
+        "13": {up: 32, down: 28}
+
+    Raises ValueError for an invalid mapping.
+    """
+    if not mapping:
+        return {}
+    if not isinstance(mapping, dict):
+        raise ValueError("Travel times must be a mapping of device ids")
+
+    travel_times: Dict[str, Tuple[float, float]] = {}
+    for device_id, entry in mapping.items():
+        if not isinstance(entry, dict):
+            entry = {"up": entry, "down": entry}
+        try:
+            up, down = float(entry["up"]), float(entry["down"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Cover {device_id} needs numeric up and down times") from None
+        if up <= 0 or down <= 0:
+            raise ValueError(f"Travel times of cover {device_id} must be positive")
+        travel_times[str(device_id)] = (up, down)
+    return travel_times
+
+class EventSubscriptions:
+    """Tags whose telegrams are fired as events, with an optional minimum interval.
+
+    Entries are exact tags or prefixes ending in "*". Exact tags live in a
+    dict and prefixes in a character trie, and the outcome for every tag is
+    memoized, so a telegram on an unsubscribed tag costs a single lookup.
+    """
+
+    def __init__(self, entries: Dict[str, float]):
+        """Compile the entries, mapping tags or prefixes to their minimum interval."""
+        self._exact: Dict[str, float] = {}
+        self._trie: Dict[str, Any] = {}
+        for tag, interval in entries.items():
+            if not tag.endswith("*"):
+                self._exact[tag] = interval
+                continue
+            node = self._trie
+            for char in tag[:-1]:
+                node = node.setdefault(char, {})
+            node[""] = interval
+        self._resolved: Dict[str, Optional[float]] = dict(self._exact)
+        self._last_fired: Dict[str, float] = {}
+
+    def __bool__(self) -> bool:
+        """Return True if any tag is subscribed."""
+        return bool(self._exact or self._trie)
+
+    def _resolve(self, tag: str) -> Optional[float]:
+        """Return the interval of the longest prefix matching the tag."""
+        interval = None
+        node = self._trie
+        if "" in node:
+            interval = node[""]
+        for char in tag:
+            node = node.get(char)
+            if node is None:
+                break
+            if "" in node:
+                interval = node[""]
+        return interval
+
+    def allow(self, tag: str, now: float) -> Optional[bool]:
+        """Return None for unsubscribed tags, else whether the rate limit lets the telegram pass."""
+        try:
+            interval = self._resolved[tag]
+        except KeyError:
+            interval = self._resolved[tag] = self._resolve(tag)
+        if interval is None:
+            return None
+        if interval:
+            last = self._last_fired.get(tag)
+            if last is not None and now - last < interval:
+                return False
+            self._last_fired[tag] = now
+        return True
+
+def load_event_tags(entries: Optional[List[Any]]) -> EventSubscriptions:
+    """Validate the tags whose telegrams are fired as events.
+
+    Entries are tags or prefixes ending in "*", either as plain strings or
+    with the minimum seconds between two events of the same tag:
+
+        - "20001"
+        - "30*"
+        - tag: "40012"
+          min_interval: 0.5
+
+    Raises ValueError for an invalid list.
+    """
+    if not entries:
+        return EventSubscriptions({})
+    if not isinstance(entries, list):
+        raise ValueError("Event tags must be a list")
+
+    tags: Dict[str, float] = {}
+    for entry in entries:
+        if isinstance(entry, (str, int)):
+            entry = {"tag": entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get("tag"), (str, int)):
+            raise ValueError("Every event entry needs a tag")
+        unknown = set(entry) - {"tag", "min_interval"}
+        if unknown:
+            raise ValueError(f"Unknown event options: {', '.join(sorted(unknown))}")
+        tag = str(entry["tag"])
+        if "*" in tag[:-1] or any(char in tag for char in "?["):
+            raise ValueError(f"Only a trailing * is supported: {tag}")
+        try:
+            interval = float(entry.get("min_interval", 0))
+        except (TypeError, ValueError):
+            raise ValueError(f"Minimum interval of {tag} must be a number") from None
+        if interval < 0:
+            raise ValueError(f"Minimum interval of {tag} must not be negative")
+        tags[tag] = interval
+    return EventSubscriptions(tags)
@@ -0,0 +1,91 @@
+"""Stream framing for the Gira HomeServer protocol."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+# Every message sent by the HomeServer is terminated by a NUL byte
+FRAME_TERMINATOR = b"\x00"
+
+# Large enough to take a full 94|| value dump in a handful of reads
+READ_SIZE = 65536
+
+
+class FrameReader:
+    """Split the NUL-terminated byte stream of a StreamReader into frames."""
+
+    def __init__(self, reader: asyncio.StreamReader, read_size: int = READ_SIZE):
+        """Initialize the frame reader."""
+        self._reader = reader
+        self._read_size = read_size
+        self._buffer = bytearray()
+        self.bytes_read = 0
+        # Bytes before this offset are known not to contain a terminator
+        self._scanned = 0
+
+    def feed(self, data: bytes) -> None:
+        """Append raw bytes received from the socket."""
+        self._buffer += data
+
+    def next_frame(self) -> Optional[str]:
+        """Pop the next complete frame from the buffer, if there is one."""
+        end = self._buffer.find(FRAME_TERMINATOR, self._scanned)
+        if end < 0:
+            # Remember how far we looked so the next read only scans new bytes
+            self._scanned = len(self._buffer)
+            return None
+
+        # Only the frame itself is copied and decoded, deleting from the
+        # front of a bytearray does not move the remaining bytes
+        frame = self._buffer[:end].decode("utf-8", "replace")
+        del self._buffer[: end + 1]
+        self._scanned = 0
+        return frame
+
+    async def read_frame(self) -> str:
+        """Return the next complete frame, reading from the socket as needed."""
+        while (frame := self.next_frame()) is None:
+            data = await self._reader.read(self._read_size)
+            if not data:
+                if self._buffer:
+                    _LOGGER.debug(
+                        "Discarding %s bytes of incomplete frame", len(self._buffer)
+                    )
+                    self._buffer.clear()
+                    self._scanned = 0
+                raise ConnectionError("No data received")
+            self.bytes_read += len(data)
+            self.feed(data)
+        return frame
+
+    def __aiter__(self) -> FrameReader:
+        """Iterate over frames until the connection is closed."""
+        return self
+
+    async def __anext__(self) -> str:
+        """Return the next frame or stop when the connection is closed."""
+        try:
+            return await self.read_frame()
+        except ConnectionError:
+            raise StopAsyncIteration from None
+
+
+def generate_hash(username: str, password: str, salt: str) -> str:
+    """Answer the login salt sent by the HomeServer."""
+    salt = [ord(c) for c in salt]
+    arr1 = "".join(
+        chr(salt[i] ^ 92 if i < len(salt) else 92) for i in range(64)
+    )
+    arr2 = "".join(
+        chr(salt[i] ^ 54 if i < len(salt) else 54) for i in range(64)
+    )
+    hash1 = (
+        hashlib.md5((arr2 + username + password).encode())
+        .hexdigest()
+        .upper()
+    )
+    return hashlib.md5((arr1 + hash1).encode()).hexdigest().upper()
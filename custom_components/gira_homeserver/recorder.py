@@ -0,0 +1,163 @@
+"""Recording and replay of the frames exchanged with the Gira HomeServer."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import os
+import queue
+import time
+from typing import TYPE_CHECKING, Iterator, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from custom_components.gira_homeserver.client import GiraClient
+
+_LOGGER = logging.getLogger(__name__)
+
+RX = "rx"
+TX = "tx"
+
+# Login actions carrying the user name, salt, password hash and session token
+REDACTED_ACTIONS = (90, 91, 92, 93)
+REDACTED = "**REDACTED**"
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+
+class RecordedFrame(NamedTuple):
+    """A frame read from a recording."""
+    time: float
+    direction: str
+    action: Optional[int]
+    frame: str
+
+
+class TrafficRecorder:
+    """Write timestamped frames as newline delimited JSON with size based rotation.
+
+    Lines are handed to a background thread, so recording never blocks the
+    event loop on file I/O. Every line holds the wall clock time, the
+    direction, the action code and the raw frame:
+
+        {"t": 1700000000.123, "dir": "rx", "action": 1, "frame": "1|123|1|0|"}
+
+    The payload of login frames is replaced, so a recording holds neither
+    the credentials nor the token that authorizes the project download.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+    ):
+        """Initialize the recorder, call start to begin writing."""
+        self.path = path
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        # A private logger keeps the frames out of the regular log
+        self._logger = logging.Logger(f"{__name__}.{path}")
+        self._listener: Optional[QueueListener] = None
+
+    def start(self) -> None:
+        """Open the file and start the writer thread."""
+        if self._listener is not None:
+            return
+        handler = RotatingFileHandler(
+            self.path,
+            maxBytes=self._max_bytes,
+            backupCount=self._backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        self._logger.addHandler(QueueHandler(records))
+        self._listener = QueueListener(records, handler)
+        self._listener.start()
+        _LOGGER.info("Recording HomeServer traffic to %s", self.path)
+
+    def stop(self) -> None:
+        """Write the remaining frames and close the file."""
+        if self._listener is None:
+            return
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+        self._listener = None
+
+    def record(self, direction: str, frame: str) -> None:
+        """Record a frame sent or received by the client."""
+        if self._listener is None:
+            return
+        action, _, _ = frame.partition("|")
+        code = int(action) if action.isdigit() else None
+        if code in REDACTED_ACTIONS:
+            frame = f"{action}|{REDACTED}|"
+        self._logger.info(
+            json.dumps(
+                {
+                    "t": round(time.time(), 6),
+                    "dir": direction,
+                    "action": code,
+                    "frame": frame,
+                },
+                separators=(",", ":"),
+            )
+        )
+
+
+def recording_files(path: str) -> list[str]:
+    """Return the files of a rotated recording, oldest first."""
+    files = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        files.append(f"{path}.{index}")
+        index += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_recording(path: str) -> Iterator[RecordedFrame]:
+    """Read every frame of a recording, including its rotated files."""
+    for name in recording_files(path):
+        with open(name, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                yield RecordedFrame(data["t"], data["dir"], data.get("action"), data["frame"])
+
+
+async def replay(client: GiraClient, path: str, speed: float = 1.0) -> int:
+    """Feed the received frames of a recording through the client's dispatch path.
+
+    Frames are delivered with their recorded spacing divided by speed, or
+    as fast as possible if speed is 0. Returns the number of replayed frames.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first: Optional[float] = None
+    count = 0
+    for recorded in read_recording(path):
+        if recorded.direction != RX:
+            continue
+        if speed > 0:
+            if first is None:
+                first = recorded.time
+            delay = started + (recorded.time - first) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif count % 1000 == 0:
+            # Let listeners and other tasks run during long replays
+            await asyncio.sleep(0)
+        client.metrics.frames_received += 1
+        client.metrics.bytes_received += len(recorded.frame.encode()) + 1
+        client.dispatch_frame(recorded.frame)
+        count += 1
+    return count
@@ -0,0 +1,194 @@
+"""Sensors for tags outside the known devices and for the client metrics."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import timedelta
+import logging
+from typing import Callable, Optional
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .client import GiraClient
+from .const import DOMAIN
+from .devices import Value
+from .entity import GiraTagEntity, async_setup_tag_entities
+from .metrics import ClientMetrics
+from .options import TagEntityConfig
+
+_LOGGER = logging.getLogger(__name__)
+
+# Metrics change with every telegram, so they are sampled instead of pushed
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+@dataclass(frozen=True, kw_only=True)
+class GiraMetricDescription(SensorEntityDescription):
+    """Describes a sensor reading one client metric."""
+    value_fn: Callable[[ClientMetrics], Optional[float]]
+
+
+METRIC_SENSORS: tuple[GiraMetricDescription, ...] = (
+    GiraMetricDescription(
+        key="frames_received",
+        name="Frames received",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.frames_received,
+    ),
+    GiraMetricDescription(
+        key="frames_sent",
+        name="Frames sent",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.frames_sent,
+    ),
+    GiraMetricDescription(
+        key="bytes_received",
+        name="Data received",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.bytes_received,
+    ),
+    GiraMetricDescription(
+        key="bytes_sent",
+        name="Data sent",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.bytes_sent,
+    ),
+    GiraMetricDescription(
+        key="frames_malformed",
+        name="Malformed frames",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.frames_malformed,
+    ),
+    GiraMetricDescription(
+        key="updates_suppressed",
+        name="Suppressed updates",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.updates_suppressed,
+    ),
+    GiraMetricDescription(
+        key="reconnects",
+        name="Reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.reconnects,
+    ),
+    GiraMetricDescription(
+        key="login_time",
+        name="Login time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=3,
+        value_fn=lambda metrics: metrics.login_time,
+    ),
+    GiraMetricDescription(
+        key="project_download_time",
+        name="Project download time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=3,
+        value_fn=lambda metrics: metrics.project_download_time,
+    ),
+    GiraMetricDescription(
+        key="project_parse_time",
+        name="Project parse time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=3,
+        value_fn=lambda metrics: metrics.project_parse_time,
+    ),
+    GiraMetricDescription(
+        key="fetch_time",
+        name="Value fetch time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=3,
+        value_fn=lambda metrics: metrics.fetch_time,
+    ),
+    GiraMetricDescription(
+        key="dispatch_latency",
+        name="Mean dispatch latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=3,
+        value_fn=lambda metrics: metrics.dispatch_latency_ms.as_dict()["mean"],
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the Gira HomeServer tag and diagnostic sensors."""
+    client: GiraClient = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities(
+        GiraMetricSensor(client, config_entry, description)
+        for description in METRIC_SENSORS
+    )
+    async_setup_tag_entities(
+        hass, config_entry, async_add_entities, "sensor", GiraTagSensor
+    )
+
+
+class GiraTagSensor(GiraTagEntity, SensorEntity):
+    """The value of a tag outside the known devices."""
+
+    def __init__(
+        self,
+        client: GiraClient,
+        tag: str,
+        value: Value,
+        config: TagEntityConfig,
+        enabled: bool,
+    ):
+        """Initialize the sensor."""
+        super().__init__(client, tag, value, config, enabled)
+        self._attr_unique_id = f"{DOMAIN}_sensor_tag_{tag}"
+        self._attr_native_unit_of_measurement = config.unit
+        if config.device_class:
+            try:
+                self._attr_device_class = SensorDeviceClass(config.device_class)
+            except ValueError:
+                _LOGGER.warning("Unknown sensor device class: %s", config.device_class)
+
+    @property
+    def native_value(self) -> Value:
+        """Return the last value of the tag."""
+        return self._value
+
+
+class GiraMetricSensor(SensorEntity):
+    """A client metric, disabled until enabled in the entity registry."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    entity_description: GiraMetricDescription
+
+    def __init__(
+        self,
+        client: GiraClient,
+        config_entry: ConfigEntry,
+        description: GiraMetricDescription,
+    ):
+        """Initialize the sensor."""
+        self._client = client
+        self.entity_description = description
+        self._attr_name = f"Gira HomeServer {description.name}"
+        self._attr_unique_id = f"{DOMAIN}_{config_entry.entry_id}_{description.key}"
+
+    @property
+    def native_value(self) -> Optional[float]:
+        """Return the current value of the metric."""
+        return self.entity_description.value_fn(self._client.metrics)
@@ -0,0 +1,225 @@
+"""Benchmarks for the parse, dispatch, framing and write hot paths.
+
+Runs every benchmark against generated projects of each size and writes the
+results as JSON, so runs of different versions can be compared:
+
+    python scripts/benchmark.py --sizes 100 1000 10000 --output before.json
+
+Needs the integration requirements, including Home Assistant, to be installed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.gira_homeserver.client import GiraClient  # noqa: E402
+from custom_components.gira_homeserver.devices import Parser  # noqa: E402
+from custom_components.gira_homeserver.protocol import FrameReader  # noqa: E402
+from homeserver_simulator import HomeServerSimulator, generate_project  # noqa: E402
+
+BENCHMARKS = ("parse", "dispatch", "framing", "write")
+DEFAULT_SIZES = (100, 1000, 10000)
+# Telegrams per dispatch burst for every device in the project
+BURST_FACTOR = 5
+SEED = 1234
+
+
+def summarize(name: str, devices: int, items: int, timings: List[float]) -> dict:
+    """Return the result of one benchmark, items is the work done per run."""
+    median = statistics.median(timings)
+    return {
+        "benchmark": name,
+        "devices": devices,
+        "items": items,
+        "runs": len(timings),
+        "min": min(timings),
+        "median": median,
+        "max": max(timings),
+        "items_per_second": items / median if median else None,
+    }
+
+
+def loaded_client(project: bytes) -> GiraClient:
+    """Return an offline client holding the parsed project."""
+    client = GiraClient("127.0.0.1", 0, "admin", "admin")
+    parser = Parser()
+    parser.parse(project)
+    client.load_project({"devices": {k: d.to_dict() for k, d in parser.devices.items()}})
+    # Every device gets a listener, as it would with its entity added
+    for device_id in client.devices:
+        client.subscribe_device(device_id, lambda: None)
+    return client
+
+
+def bench_parse(devices: int, repeat: int) -> dict:
+    """Parse a complete client_project.xml."""
+    project, _ = generate_project(devices)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        Parser().parse(project)
+        timings.append(time.perf_counter() - started)
+    return summarize("parse", devices, devices, timings)
+
+
+def bench_dispatch(devices: int, repeat: int) -> List[dict]:
+    """Dispatch a burst of update telegrams and a 94|| value dump."""
+    project, values = generate_project(devices)
+    client = loaded_client(project)
+    rng = random.Random(SEED)
+    tags = list(values)
+    burst = [f"1|{rng.choice(tags)}|{rng.randint(0, 100)}|0|" for _ in range(devices * BURST_FACTOR)]
+
+    def dispatch(frames: List[str]) -> None:
+        # The same per frame path as a live connection, metrics included
+        for frame in frames:
+            client.dispatch_frame(frame)
+
+    results = []
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        dispatch(burst)
+        timings.append(time.perf_counter() - started)
+    results.append(summarize("dispatch_burst", devices, len(burst), timings))
+
+    timings = []
+    for run in range(repeat):
+        # Alternate the dumped values, an unchanged dump is suppressed early
+        dump = "2|" + "".join(f"{tag}|{run % 2}|0|" for tag in tags)
+        started = time.perf_counter()
+        dispatch([dump])
+        timings.append(time.perf_counter() - started)
+    results.append(summarize("dispatch_dump", devices, len(tags), timings))
+    return results
+
+
+async def bench_framing(devices: int, repeat: int) -> dict:
+    """Split a fragmented byte stream into frames."""
+    _, values = generate_project(devices)
+    rng = random.Random(SEED)
+    tags = list(values)
+    count = devices * BURST_FACTOR
+    data = "".join(
+        f"1|{rng.choice(tags)}|{rng.randint(0, 100)}|0|\x00" for _ in range(count)
+    ).encode()
+    # Cut the stream like a congested TCP connection would
+    chunks = []
+    pos = 0
+    while pos < len(data):
+        end = min(len(data), pos + rng.randint(1, 1500))
+        chunks.append(data[pos:end])
+        pos = end
+
+    timings = []
+    for _ in range(repeat):
+        reader = asyncio.StreamReader(limit=2**30)
+        for chunk in chunks:
+            reader.feed_data(chunk)
+        reader.feed_eof()
+        frames = FrameReader(reader)
+        started = time.perf_counter()
+        received = 0
+        async for _ in frames:
+            received += 1
+        timings.append(time.perf_counter() - started)
+        assert received == count, f"expected {count} frames, got {received}"
+    return summarize("framing", devices, count, timings)
+
+
+async def bench_write(devices: int, repeat: int) -> dict:
+    """Send a value to every tag through the write queue to a local simulator."""
+    simulator = HomeServerSimulator(devices=devices)
+    await simulator.start()
+    client = GiraClient("127.0.0.1", simulator.port, "admin", "admin", command_interval=0)
+    try:
+        client.start()
+        await wait_for(lambda: client.available)
+        commands = [
+            (slot.device_id, slot.tag)
+            for device in client.devices.values()
+            for slot in device.slots.values()
+        ]
+
+        timings = []
+        for run in range(repeat):
+            simulator.received.clear()
+            value = str(run % 2)
+            started = time.perf_counter()
+            for device_id, tag in commands:
+                await client.update_device_value(device_id, tag, value)
+            await wait_for(
+                lambda: sum(frame.startswith("1|") for frame in simulator.received) >= len(commands)
+            )
+            timings.append(time.perf_counter() - started)
+    finally:
+        await client.disconnect()
+        await simulator.stop()
+    return summarize("write", devices, len(commands), timings)
+
+
+async def wait_for(condition: Callable[[], bool], timeout: float = 60) -> None:
+    """Poll until the condition holds."""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Benchmark condition not reached")
+        await asyncio.sleep(0.001)
+
+
+async def run(benchmarks: List[str], sizes: List[int], repeat: int) -> List[dict]:
+    """Run the selected benchmarks for every size."""
+    results: List[dict] = []
+    runners: Dict[str, Callable[[int, int], Awaitable]] = {
+        "framing": bench_framing,
+        "write": bench_write,
+    }
+    for devices in sizes:
+        for name in benchmarks:
+            print(f"Running {name} with {devices} devices", file=sys.stderr)
+            if name == "parse":
+                results.append(bench_parse(devices, repeat))
+            elif name == "dispatch":
+                results.extend(bench_dispatch(devices, repeat))
+            else:
+                results.append(await runners[name](devices, repeat))
+    return results
+
+
+def main() -> None:
+    """Run the benchmarks and write the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": asyncio.run(run(args.benchmarks, args.sizes, args.repeat)),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
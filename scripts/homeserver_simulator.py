@@ -0,0 +1,320 @@
+"""Local stand-in for a Gira HomeServer.
+
+Implements the parts of the protocol used by GiraClient on a single port:
+the GET /QUAD/LOGIN handshake with the 100/90/91/92/93 hash exchange,
+94|| value dumps, 1|tag|value writes with echoes to every client, and the
+client_project.xml download with a generated project of N devices.
+
+It can also push random telegrams at a fixed rate, split outgoing frames at
+random byte offsets and drop connections, which makes framing, reconnect and
+throughput work testable without hardware:
+
+    python scripts/homeserver_simulator.py --devices 1000 --rate 200 --split
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import secrets
+import sys
+from typing import Dict, List, Optional, Set
+from xml.sax.saxutils import quoteattr
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.gira_homeserver.protocol import FrameReader, generate_hash  # noqa: E402
+
+_LOGGER = logging.getLogger("homeserver_simulator")
+
+# Slot layouts of the generated devices, matching the default device config
+DEVICE_LAYOUTS = [
+    ("Light", ["switch"]),
+    ("Dimmer", ["dim_s", "dim_val"]),
+    ("Switch", ["slot_switch"]),
+    ("Cover", ["slot_short", "slot_long", "slot_position"]),
+    ("Climate", ["slot_targetvalue", "slot_temp_actual"]),
+]
+
+PROJECT_PATH = "/quad/client/client_project.xml"
+
+
+def generate_project(devices: int, first_tag: int = 10000) -> tuple[bytes, Dict[str, str]]:
+    """Return a client_project.xml with the given number of devices and its initial values."""
+    values: Dict[str, str] = {}
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', "<project>", "<devices>"]
+    tag = first_tag
+    for device_id in range(1, devices + 1):
+        kind, slots = DEVICE_LAYOUTS[(device_id - 1) % len(DEVICE_LAYOUTS)]
+        name = quoteattr(f"{kind} {device_id}")
+        lines.append(f'<device id="{device_id}" txt={name}>')
+        for slot in slots:
+            lines.append(f'<connect slot="{slot}" tag="{tag}"/>')
+            values[str(tag)] = "21.5" if slot.startswith("slot_t") else "0"
+            tag += 1
+        lines.append("</device>")
+    lines.extend(["</devices>", "</project>"])
+    return "\n".join(lines).encode(), values
+
+
+class Session:
+    """A single protocol connection."""
+
+    def __init__(self, simulator: HomeServerSimulator, writer: asyncio.StreamWriter):
+        """Initialize the session."""
+        self.simulator = simulator
+        self.writer = writer
+        self.logged_in = False
+        self.salt = secrets.token_hex(8)
+
+    async def send(self, *frames: str) -> None:
+        """Send frames, optionally cut into pieces at random byte offsets."""
+        data = "".join(f"{frame}\x00" for frame in frames).encode()
+        if not self.simulator.split:
+            self.writer.write(data)
+        else:
+            pos = 0
+            while pos < len(data):
+                end = min(len(data), pos + random.randint(1, 64))
+                self.writer.write(data[pos:end])
+                await self.writer.drain()
+                pos = end
+        await self.writer.drain()
+
+    def close(self) -> None:
+        """Drop the connection."""
+        self.writer.close()
+
+
+class HomeServerSimulator:
+    """Asyncio server speaking the HomeServer protocol and serving the project."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        username: str = "admin",
+        password: str = "admin",
+        devices: int = 100,
+        rate: float = 0.0,
+        split: bool = False,
+        drop_after: Optional[float] = None,
+        max_clients: Optional[int] = None,
+    ):
+        """Initialize the simulator."""
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.rate = rate
+        self.split = split
+        self.drop_after = drop_after
+        self.max_clients = max_clients
+        self.project, self.values = generate_project(devices)
+        self.etag = f'"{hashlib.sha256(self.project).hexdigest()[:16]}"'
+        self.sessions: Set[Session] = set()
+        self.tokens: Set[str] = set()
+        self.received: List[str] = []
+        self.telegrams_sent = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start listening, and the telegram and drop timers if configured."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.rate > 0:
+            self._tasks.append(asyncio.create_task(self._replay_telegrams()))
+        if self.drop_after:
+            self._tasks.append(asyncio.create_task(self._drop_periodically()))
+        _LOGGER.info(
+            "Simulating HomeServer with %s tags on %s:%s",
+            len(self.values),
+            self.host,
+            self.port,
+        )
+
+    async def stop(self) -> None:
+        """Stop the server and drop every connection."""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+        self.drop_connections()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def drop_connections(self) -> None:
+        """Close every protocol connection, as a HomeServer reboot would."""
+        for session in list(self.sessions):
+            session.close()
+        self.sessions.clear()
+
+    async def broadcast(self, tag: str, value: str) -> None:
+        """Store a value and push it to every logged in client."""
+        self.values[tag] = value
+        self.telegrams_sent += 1
+        for session in list(self.sessions):
+            if session.logged_in:
+                try:
+                    await session.send(f"1|{tag}|{value}|0|")
+                except ConnectionError:
+                    self.sessions.discard(session)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Dispatch a new connection to the protocol or the HTTP handler."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        request_line, *header_lines = head.decode(errors="replace").split("\r\n")
+        headers = {
+            key.strip().lower(): value.strip()
+            for key, _, value in (line.partition(":") for line in header_lines if line)
+        }
+        if request_line.startswith("GET /QUAD/LOGIN"):
+            await self._handle_protocol(reader, writer)
+        else:
+            await self._handle_http(request_line, headers, writer)
+
+    async def _handle_http(self, request_line: str, headers: Dict[str, str], writer: asyncio.StreamWriter) -> None:
+        """Serve the generated project to clients holding a login token."""
+        path = request_line.split(" ")[1] if " " in request_line else ""
+        location, _, token = path.partition("?")
+        if location != PROJECT_PATH or token not in self.tokens:
+            status, body, extra = "403 Forbidden", b"", ""
+        elif headers.get("if-none-match") == self.etag:
+            status, body, extra = "304 Not Modified", b"", f"ETag: {self.etag}\r\n"
+        else:
+            status, body, extra = "200 OK", self.project, f"ETag: {self.etag}\r\n"
+
+        writer.write(
+            (
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/xml\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"{extra}"
+                "Connection: close\r\n\r\n"
+            ).encode()
+            + body
+        )
+        await writer.drain()
+        writer.close()
+
+    async def _handle_protocol(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Run the login exchange and then serve values and writes."""
+        if self.max_clients is not None and len(self.sessions) >= self.max_clients:
+            _LOGGER.info("Rejecting connection, %s clients connected", len(self.sessions))
+            writer.close()
+            return
+        session = Session(self, writer)
+        self.sessions.add(session)
+        frames = FrameReader(reader)
+        try:
+            # The login request itself is NUL terminated as well
+            await frames.read_frame()
+            await session.send("100||")
+            async for frame in frames:
+                self.received.append(frame)
+                if not await self._handle_frame(session, frame):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+    async def _handle_frame(self, session: Session, frame: str) -> bool:
+        """Answer one client frame, returns False to close the connection."""
+        parts = frame.split("|")
+        action = parts[0]
+        if action == "90":
+            await session.send(f"91|{session.salt}|")
+        elif action == "92":
+            expected = generate_hash(self.username, self.password, session.salt)
+            if len(parts) < 2 or parts[1] != expected:
+                _LOGGER.info("Rejecting login with bad credentials")
+                return False
+            token = secrets.token_hex(8)
+            self.tokens.add(token)
+            session.logged_in = True
+            await session.send(f"93|{token}|")
+        elif not session.logged_in:
+            _LOGGER.info("Rejecting frame before login: %s", frame)
+            return False
+        elif action == "94":
+            dump = "".join(f"{tag}|{value}|0|" for tag, value in self.values.items())
+            await session.send(f"2|{dump}")
+        elif action == "1" and len(parts) >= 3:
+            await self.broadcast(parts[1], parts[2])
+        return True
+
+    async def _replay_telegrams(self) -> None:
+        """Push random value changes at the configured rate."""
+        tags = list(self.values)
+        interval = 1 / self.rate
+        loop = asyncio.get_running_loop()
+        next_send = loop.time()
+        while True:
+            next_send += interval
+            tag = random.choice(tags)
+            await self.broadcast(tag, str(random.randint(0, 100)))
+            await asyncio.sleep(max(0.0, next_send - loop.time()))
+
+    async def _drop_periodically(self) -> None:
+        """Drop every connection after the configured time."""
+        while True:
+            await asyncio.sleep(self.drop_after)
+            _LOGGER.info("Dropping %s connections", len(self.sessions))
+            self.drop_connections()
+
+
+async def main() -> None:
+    """Run the simulator until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--devices", type=int, default=100, help="number of generated devices")
+    parser.add_argument("--rate", type=float, default=0.0, help="random telegrams per second")
+    parser.add_argument("--split", action="store_true", help="split frames at random byte offsets")
+    parser.add_argument("--drop-after", type=float, help="drop all connections every N seconds")
+    parser.add_argument("--max-clients", type=int, help="reject protocol connections beyond N")
+    parser.add_argument("--seed", type=int, help="seed for reproducible runs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    simulator = HomeServerSimulator(
+        args.host,
+        args.port,
+        username=args.username,
+        password=args.password,
+        devices=args.devices,
+        rate=args.rate,
+        split=args.split,
+        drop_after=args.drop_after,
+        max_clients=args.max_clients,
+    )
+    await simulator.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
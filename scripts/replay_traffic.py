@@ -0,0 +1,76 @@
+"""Replay a recorded HomeServer session through the client's dispatch path.
+
+Recordings are written by the integration when "Record HomeServer traffic"
+is enabled in its options. The received frames are fed to an offline
+GiraClient holding the project, with a listener on every device like the
+entities would register, and the client metrics are printed as JSON:
+
+    python scripts/replay_traffic.py gira_homeserver_<entry>.ndjson --project client_project.xml --speed 0
+
+Needs the integration requirements, including Home Assistant, to be installed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from custom_components.gira_homeserver.client import GiraClient  # noqa: E402
+from custom_components.gira_homeserver.devices import Parser  # noqa: E402
+from custom_components.gira_homeserver.recorder import replay  # noqa: E402
+
+
+async def main() -> None:
+    """Replay the recording and print the metrics."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="recording file, rotated files are read as well")
+    parser.add_argument("--project", help="client_project.xml to classify the devices with")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="multiple of the recorded speed, 0 replays as fast as possible",
+    )
+    args = parser.parse_args()
+
+    client = GiraClient("127.0.0.1", 0, "replay", "replay")
+    if args.project:
+        project = Parser()
+        with open(args.project, "rb") as file:
+            project.parse(file.read())
+        client.load_project(
+            {"devices": {key: device.to_dict() for key, device in project.devices.items()}}
+        )
+    updates = 0
+
+    def count_update() -> None:
+        nonlocal updates
+        updates += 1
+
+    for device_id in client.devices:
+        client.subscribe_device(device_id, count_update)
+
+    started = time.perf_counter()
+    frames = await replay(client, args.recording, args.speed)
+    elapsed = time.perf_counter() - started
+    print(
+        json.dumps(
+            {
+                "frames": frames,
+                "seconds": elapsed,
+                "frames_per_second": frames / elapsed if elapsed else None,
+                "device_updates": updates,
+                "metrics": client.metrics.as_dict(),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())